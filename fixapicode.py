@@ -1,13 +1,49 @@
 # Import libraries
+import os
+import sys
+import mmap
+import zlib
+import random
+import struct
+import atexit
 import socket
 import ssl
+import asyncio
+import shutil
+import tempfile
+import zipfile
+import itertools
+import multiprocessing
 import datetime
+import calendar
 import time
-import pandas as pd
-import numpy as np
-import requests
-from threading import Thread, Lock
-from queue import Queue
+import math
+import importlib
+from threading import Thread, Lock, Condition, Event
+from queue import Queue, Empty
+from collections import deque
+
+class _LazyModule:
+    # Stands in for a heavy module until an attribute is first used, then imports it and
+    # rebinds the module-level name, so the FIX session path starts on the standard library
+    def __init__(self, name, alias):
+        self._name = name
+        self._alias = alias
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+pd = _LazyModule("pandas", "pd")
+np = _LazyModule("numpy", "np")
+requests = _LazyModule("requests", "requests")
+
+def preload_modules(names=("numpy", "pandas", "requests")):
+    # Imports the analytics stack on a background thread while the sessions connect
+    thread = Thread(target=lambda: [importlib.import_module(name) for name in names], daemon=True)
+    thread.start()
+    return thread
 
 # FIX Credentials
 # Note: Replace with your own credentials securely (see README for instructions)
@@ -34,6 +70,36 @@ TELEGRAM_CHAT_ID = "YOUR_TELEGRAM_CHAT_ID_HERE"  # Placeholder
 
 FIX_VERSION = "FIX.4.4"
 HEARTBEAT_INTERVAL = 10
+TEST_REQUEST_GRACE = 2  # Seconds of inbound silence beyond HeartBtInt before sending a TestRequest
+LOGON_TIMEOUT = 15
+RECONNECT_BACKOFF = (0.25, 30.0)  # Base and cap in seconds for jittered backoff; the first retry is immediate
+ORDER_QUANTITY = 0.01
+H4_NS = 4 * 3600 * 1_000_000_000
+
+# Candle timeframes built from the tick stream
+TIMEFRAME_NS = {
+    "M1": 60 * 1_000_000_000,
+    "M15": 15 * 60 * 1_000_000_000,
+    "H1": 3600 * 1_000_000_000,
+    "H4": H4_NS,
+    "D1": 24 * 3600 * 1_000_000_000
+}
+BAR_HISTORY = 500  # Completed bars kept per timeframe
+DAY_NS = TIMEFRAME_NS["D1"]
+
+# Tick/candle archive; set to None to disable recording and warm start
+ARCHIVE_DIR = "tick_archive"
+
+# Persisted FIX sequence numbers per session; set to None to keep them in memory only
+SESSION_STATE_DIR = "session_state"
+
+# Prometheus text endpoint on localhost; set to None to disable
+METRICS_PORT = 9108
+
+# Log level per category (DEBUG shows FIX traffic); market data is capped at MD_LOG_RATE lines/second
+LOG_LEVELS = {"session": "DEBUG", "market_data": "DEBUG", "orders": "DEBUG"}
+MD_LOG_RATE = 5
+FIX_JOURNAL = None  # e.g. "fix_journal.bin" to record every raw FIX message
 
 # Symbol mapping
 symbol_id_map = {
@@ -49,464 +115,3665 @@ pairs_params = {
         "pip_value": 0.01,     # GBP/JPY pip value
         "slippage": 0.02,      # Slippage in pips
         "spread": 0.02,        # Typical spread
-        "commission": 0.5      # Commission per 0.01 lot
+        "commission": 0.5,     # Commission per 0.01 lot
+        "lookback": 1,         # Earlier H4 bars an equal high/low may match
+        "latency_ms": 40,      # Median signal-to-fill latency
+        "volatility": 0.0017   # Price standard deviation per sqrt(second), for drift during latency
     }
 }
 
+# Execution-cost model
+SPREAD_HOUR_PROFILE = (1.3, 1.3, 1.2, 1.2, 1.2, 1.1, 1.1, 0.9, 0.8, 0.8, 0.8, 0.8,  # Spread multiplier by UTC hour,
+                       0.8, 0.8, 0.8, 0.8, 0.9, 1.0, 1.0, 1.1, 1.2, 2.5, 3.0, 1.8)  # rescaled to average 1
+SLIPPAGE_TAIL_DF = 3  # Student-t degrees of freedom for slippage; lower means fatter tails (must be > 2)
+LATENCY_SIGMA = 0.5   # Lognormal shape of the order latency around its median
+
+# Strategy rules shared by the live trader and the backtester; they accept scalars or NumPy arrays
+def level_distance(values, lookback=1):
+    # Per bar, the smallest |values[k] - values[k - j]| for j = 1..lookback (inf for the first bar)
+    values = np.asarray(values, dtype=np.float64)
+    distance = np.full(len(values), np.inf)
+    for j in range(1, min(lookback, len(values) - 1) + 1):
+        np.minimum(distance[j:], np.abs(values[j:] - values[:-j]), out=distance[j:])
+    return distance
+
+def equal_levels_rule(bars, tolerance, lookback=1):
+    # Signal rule over whole OHLC arrays (a dict with BAR_FIELDS keys): BUY when a bullish bar's
+    # low is within tolerance of one of the previous `lookback` lows, SELL when a bearish bar's
+    # high matches a previous high. A vector of tolerances gives (len(tolerance), bars) results.
+    tolerance = np.asarray(tolerance, dtype=np.float64)
+    if tolerance.ndim:
+        tolerance = tolerance[:, None]
+    eq_high = level_distance(bars['high'], lookback) < tolerance
+    eq_low = level_distance(bars['low'], lookback) < tolerance
+    return eq_low & (bars['close'] > bars['open']), eq_high & (bars['close'] < bars['open'])
+
+class EqualLevelsState:
+    # Incremental form of equal_levels_rule for one instrument's live bars: the last `lookback`
+    # highs and lows sit in fixed-size lists used as rings, so update() allocates nothing
+    def __init__(self, tolerance, lookback=1):
+        self.tolerance = tolerance
+        self.lookback = lookback
+        self.highs = [0.0] * lookback
+        self.lows = [0.0] * lookback
+        self.count = 0
+
+    def update(self, open_, high, low, close):
+        eq_high = eq_low = False
+        for j in range(min(self.count, self.lookback)):
+            eq_high = eq_high or abs(high - self.highs[j]) < self.tolerance
+            eq_low = eq_low or abs(low - self.lows[j]) < self.tolerance
+        i = self.count % self.lookback
+        self.highs[i] = high
+        self.lows[i] = low
+        self.count += 1
+        return eq_low and close > open_, eq_high and close < open_
+
+# Name -> (array rule, incremental state); choose one per pair with a "rule" entry in pairs_params
+SIGNAL_RULES = {"equal_levels": (equal_levels_rule, EqualLevelsState)}
+
+def signal_rule(params):
+    return SIGNAL_RULES[params.get('rule', "equal_levels")]
+
+def exit_hits(side, bid, ask, sl, tp):
+    # (stop loss touched, take profit touched) on the quote that closes the position: a BUY is
+    # sold at the bid and a SELL bought back at the ask, so the spread is paid on both exits
+    if side == 'BUY':
+        return bid <= sl, bid >= tp
+    return ask >= sl, ask <= tp
+
+def trade_directions(side):
+    # 1 for BUY, -1 for SELL; accepts 'BUY'/'SELL' or signed numbers, scalar or array
+    side = np.asarray(side)
+    if side.dtype.kind in 'USO':
+        return np.where(side == 'BUY', 1, -1).astype(np.int8)
+    return np.sign(side).astype(np.int8)
+
+def bracket_prices(entry_price, side, params):
+    sl_distance = params['sl_pips'] * params['pip_value']
+    tp_distance = params['tp_pips'] * params['pip_value']
+    if side == 'BUY':
+        return entry_price - sl_distance, entry_price + tp_distance
+    return entry_price + sl_distance, entry_price - tp_distance
+
+def trading_hours_allowed(hour):
+    return (hour < 21) | (hour >= 23)  # No new trades 21:00-23:00 UTC
+
+def datetime_to_ns(value):
+    return calendar.timegm(value.utctimetuple()) * 1_000_000_000 + value.microsecond * 1000
+
+class SystemClock:
+    def now(self):
+        return datetime.datetime.now(datetime.UTC)
+
+    def now_ns(self):
+        return time.time_ns()
+
+class ReplayClock:
+    # Clock driven by recorded tick times instead of the wall clock
+    def __init__(self, time_ns=0):
+        self.time_ns = time_ns
+
+    def set(self, time_ns):
+        self.time_ns = time_ns
+
+    def now(self):
+        return datetime.datetime.fromtimestamp(self.time_ns / 1e9, datetime.UTC)
+
+    def now_ns(self):
+        return self.time_ns
+
 class RealisticExecution:
-    def __init__(self, params):
+    # Execution-cost model. A fill pays the spread scaled by the hour-of-day profile, Student-t
+    # slippage with params['slippage'] as its standard deviation, price drift over a lognormal
+    # order latency, and commission, all charged against the trade direction. sample() draws
+    # fills in bulk for research; adjust_price() serves one live fill at a time from a pre-drawn
+    # buffer, so an order allocates no arrays.
+    def __init__(self, params, rng=None, spread_profile=SPREAD_HOUR_PROFILE, tail_df=SLIPPAGE_TAIL_DF,
+                 latency_sigma=LATENCY_SIGMA, buffer_size=1024):
         self.params = params
+        self.rng = rng if rng is not None else np.random.default_rng()
+        profile = np.asarray(spread_profile, dtype=np.float64)
+        self.spread_by_hour = params['spread'] * profile / profile.mean()
+        self.tail_df = tail_df
+        self.slippage_scale = params['slippage'] * np.sqrt((tail_df - 2) / tail_df)  # Unit-variance t
+        self.latency_ms = params.get('latency_ms', 0.0)
+        self.latency_sigma = latency_sigma
+        self.volatility = params.get('volatility', 0.0)
+        self.commission = params['commission'] * 0.01  # Price units
+        self.buffer_size = buffer_size
+        self._spread = self.spread_by_hour.tolist()
+        self._noise = []
+        self._next = 0
 
-    def adjust_price(self, price, trade_type):
-        slippage = self.params['slippage'] if np.random.random() > 0.5 else -self.params['slippage']
-        if trade_type == 'BUY':
-            adjusted = price + self.params['spread'] + slippage
-        else:
-            adjusted = price - self.params['spread'] + slippage
-        adjusted += self.params['commission'] * 0.01
+    def sample(self, n, hour=None):
+        # n fills as arrays of cost components in price units (positive = against the trade);
+        # hour is a UTC hour or an array of them, None for the day-average spread
+        rng = self.rng
+        spread = np.full(n, self.params['spread']) if hour is None else self.spread_by_hour[np.asarray(hour) % 24]
+        slippage = self.slippage_scale * rng.standard_t(self.tail_df, n)
+        latency_ms = self.latency_ms * np.exp(self.latency_sigma * rng.standard_normal(n))
+        drift = self.volatility * np.sqrt(latency_ms / 1000) * rng.standard_normal(n)
+        return {
+            'spread': np.broadcast_to(spread, n),
+            'slippage': slippage,
+            'drift': drift,
+            'latency_ms': latency_ms,
+            'cost': spread + slippage + drift + self.commission
+        }
+
+    def adjust_prices(self, prices, side, hour=None):
+        # Vectorized adjust_price without rounding; side is 'BUY'/'SELL' or +-1, scalar or array
+        prices = np.asarray(prices, dtype=np.float64)
+        return prices + trade_directions(side) * self.sample(prices.size, hour)['cost'].reshape(prices.shape)
+
+    def _refill(self):
+        fills = self.sample(self.buffer_size)
+        self._noise = (fills['slippage'] + fills['drift']).tolist()
+        self._next = 0
+
+    def adjust_price(self, price, trade_type, hour=None):
+        i = self._next
+        if i == len(self._noise):
+            self._refill()
+            i = 0
+        self._next = i + 1
+        spread = self.params['spread'] if hour is None else self._spread[hour % 24]
+        cost = spread + self._noise[i] + self.commission
+        adjusted = price + cost if trade_type == 'BUY' else price - cost
         return round(adjusted, 3)
 
-class LiveTrader:
+SOH = 0x01
+MAX_FIX_BODY_LENGTH = 1 << 20  # Anything larger is treated as a corrupt BodyLength
+
+class FixFramer:
+    # Incremental FIX framer. Raw socket bytes accumulate in one reusable buffer and
+    # complete messages are handed out as memoryview slices of it (no copies). Sockets read
+    # straight into it through writable()/commit(). A slice is only valid until the next
+    # writable/feed call, which may compact the buffer.
+    def __init__(self, capacity=65536, verify_checksum=False):
+        self.buf = bytearray(capacity)
+        self.view = memoryview(self.buf)
+        self.start = 0  # First unconsumed byte
+        self.end = 0    # End of received data
+        self.verify_checksum = verify_checksum
+        self.discarded_bytes = 0
+
+    def reset(self):
+        self.start = self.end = 0
+
+    def pending(self):
+        return self.end - self.start
+
+    def _reserve(self, n):
+        if len(self.buf) - self.end >= n:
+            return
+        pending = self.end - self.start
+        if pending + n <= len(self.buf):
+            # Only the unfinished tail message is moved to the front
+            self.buf[0:pending] = self.buf[self.start:self.end]
+        else:
+            new_buf = bytearray(max(len(self.buf) * 2, pending + n))
+            new_buf[0:pending] = self.view[self.start:self.end]
+            self.buf = new_buf
+            self.view = memoryview(new_buf)
+        self.start, self.end = 0, pending
+
+    def feed(self, data):
+        n = len(data)
+        self._reserve(n)
+        self.view[self.end:self.end + n] = data
+        self.end += n
+
+    def writable(self, min_free=4096):
+        # Free tail of the buffer for a socket or transport to receive into; then commit(n)
+        self._reserve(min_free)
+        return self.view[self.end:]
+
+    def commit(self, n):
+        self.end += n
+
+    def _resync(self, pos):
+        # Drop garbage up to the next BeginString
+        nxt = self.buf.find(b"8=FIX", pos + 1, self.end)
+        if nxt < 0:
+            nxt = max(pos + 1, self.end - 4)  # Keep a possible split "8=FI" prefix
+        self.discarded_bytes += nxt - self.start
+        self.start = nxt
+
+    def next_message(self):
+        buf = self.buf
+        while True:
+            start, end = self.start, self.end
+            if end - start < 2:
+                return None
+            if not buf.startswith(b"8=", start):
+                self._resync(start)
+                continue
+            soh1 = buf.find(b"\x01", start, end)
+            if soh1 < 0:
+                return None
+            if end - soh1 < 3:
+                return None
+            if not buf.startswith(b"9=", soh1 + 1):
+                self._resync(start)
+                continue
+            soh2 = buf.find(b"\x01", soh1 + 3, end)
+            if soh2 < 0:
+                return None
+            length_field = buf[soh1 + 3:soh2]
+            if not length_field.isdigit() or int(length_field) > MAX_FIX_BODY_LENGTH:
+                self._resync(start)
+                continue
+            trailer = soh2 + 1 + int(length_field)
+            msg_end = trailer + 7  # "10=NNN<SOH>"
+            if msg_end > end:
+                return None
+            if not buf.startswith(b"10=", trailer) or buf[msg_end - 1] != SOH:
+                self._resync(start)
+                continue
+            if self.verify_checksum:
+                expected = buf[trailer + 3:trailer + 6]
+                if not expected.isdigit() or sum(buf[start:trailer]) % 256 != int(expected):
+                    self._resync(start)
+                    continue
+            if msg_end == end:
+                self.start = self.end = 0
+            else:
+                self.start = msg_end
+            return self.view[start:msg_end]
+
+    def messages(self):
+        while True:
+            msg = self.next_message()
+            if msg is None:
+                return
+            yield msg
+
+class TickStore:
+    # Columnar tick buffer for one instrument: int64 epoch-ns time, float64 bid/ask in
+    # preallocated arrays. Appends are amortized O(1): consumed ticks are compacted away
+    # when at least half the buffer is dead, otherwise capacity doubles.
+    def __init__(self, capacity=65536):
+        self.time = np.empty(capacity, dtype=np.int64)
+        self.bid = np.empty(capacity, dtype=np.float64)
+        self.ask = np.empty(capacity, dtype=np.float64)
+        self.head = 0  # First live tick
+        self.size = 0  # One past the last tick
+        self.base = 0  # Absolute index of buffer position 0; a tick's index survives compaction
+
+    def __len__(self):
+        return self.size - self.head
+
+    @property
+    def empty(self):
+        return self.size == self.head
+
+    def _make_room(self):
+        live = self.size - self.head
+        capacity = len(self.time)
+        if self.head and live <= capacity // 2:
+            for column in (self.time, self.bid, self.ask):
+                column[:live] = column[self.head:self.size]
+        else:
+            capacity *= 2
+            for name in ('time', 'bid', 'ask'):
+                column = getattr(self, name)
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[:live] = column[self.head:self.size]
+                setattr(self, name, grown)
+        self.base += self.head
+        self.head, self.size = 0, live
+
+    def append(self, time_ns, bid, ask):
+        i = self.size
+        if i == len(self.time):
+            self._make_room()
+            i = self.size
+        self.time[i] = time_ns
+        self.bid[i] = bid
+        self.ask[i] = ask
+        self.size = i + 1
+
+    def _bounds(self, start_ns=None, end_ns=None):
+        times = self.time[self.head:self.size]
+        lo = 0 if start_ns is None else int(np.searchsorted(times, start_ns, side='left'))
+        hi = len(times) if end_ns is None else int(np.searchsorted(times, end_ns, side='left'))
+        return self.head + lo, self.head + max(lo, hi)
+
+    def view(self, start_ns=None, end_ns=None):
+        # Read-only (time, bid, ask) slices for start_ns <= time < end_ns. They alias the
+        # store, so use them under the owner's lock before the next append.
+        return self._columns(*self._bounds(start_ns, end_ns))
+
+    @property
+    def end_index(self):
+        # Absolute index the next appended tick will get; ticks are numbered from 0 in arrival order
+        return self.base + self.size
+
+    def view_from(self, index):
+        # Like view(), for the live ticks with absolute index >= index. Unlike times, indexes
+        # tell apart ticks that share a (millisecond) timestamp.
+        return self._columns(max(self.head, index - self.base), self.size)
+
+    def _columns(self, lo, hi):
+        columns = []
+        for column in (self.time, self.bid, self.ask):
+            window = column[lo:hi]
+            window.flags.writeable = False
+            columns.append(window)
+        return tuple(columns)
+
+    def latest(self):
+        i = self.size - 1
+        return int(self.time[i]), float(self.bid[i]), float(self.ask[i])
+
+    def discard_before(self, time_ns):
+        self.head = self._bounds(time_ns)[0]
+
+BAR_FIELDS = ('time', 'open', 'high', 'low', 'close', 'bid', 'ask', 'ticks', 'volume')
+
+class BarHistory:
+    # Fixed-size ring of completed bars stored column-wise
+    def __init__(self, maxlen=BAR_HISTORY):
+        self.maxlen = maxlen
+        self.columns = {name: np.zeros(maxlen, dtype=np.int64 if name in ('time', 'ticks') else np.float64)
+                        for name in BAR_FIELDS}
+        self.count = 0  # Bars ever appended
+
+    def __len__(self):
+        return min(self.count, self.maxlen)
+
+    def append(self, bar):
+        i = self.count % self.maxlen
+        for name, column in self.columns.items():
+            column[i] = bar[name]
+        self.count += 1
+
+    def arrays(self):
+        # Oldest-first copies of each column
+        n = len(self)
+        split = self.count % self.maxlen
+        if n < self.maxlen or split == 0:
+            return {name: column[:n].copy() for name, column in self.columns.items()}
+        return {name: np.concatenate((column[split:], column[:split])) for name, column in self.columns.items()}
+
+    def last(self, n=1):
+        n = min(n, len(self))
+        bars = []
+        for k in range(self.count - n, self.count):
+            i = k % self.maxlen
+            bars.append({name: column[i].item() for name, column in self.columns.items()})
+        return bars
+
+class BarBuilder:
+    # Incremental OHLC bars for one instrument on several timeframes at once. Each tick costs
+    # a constant amount of work per timeframe; bars close on the first tick at or past their
+    # boundary, or from close_due() when the market is quiet. end[i] keeps the boundary of the
+    # last closed bar, and a late tick stamped before it (in flight when the timer closed the bar)
+    # is dropped rather than reopening a period that already closed.
+    def __init__(self, timeframes=tuple(TIMEFRAME_NS), history=BAR_HISTORY):
+        self.timeframes = tuple(timeframes)
+        self.periods = [TIMEFRAME_NS[tf] for tf in self.timeframes]
+        n = len(self.timeframes)
+        self.start = [None] * n
+        self.end = [0] * n  # End of the forming bar, or of the last closed one
+        self.open = [0.0] * n
+        self.high = [0.0] * n
+        self.low = [0.0] * n
+        self.close = [0.0] * n
+        self.ask = [0.0] * n
+        self.ticks = [0] * n
+        self.volume = [0.0] * n
+        self.history = {tf: BarHistory(history) for tf in self.timeframes}
+
+    def _bar(self, i):
+        return {'time': self.start[i], 'open': self.open[i], 'high': self.high[i], 'low': self.low[i],
+                'close': self.close[i], 'bid': self.close[i], 'ask': self.ask[i],
+                'ticks': self.ticks[i], 'volume': self.volume[i]}
+
+    def _close(self, i):
+        bar = self._bar(i)
+        self.history[self.timeframes[i]].append(bar)
+        self.start[i] = None
+        return self.timeframes[i], bar
+
+    def update(self, time_ns, bid, ask, volume=0.0):
+        closed = []
+        for i, period in enumerate(self.periods):
+            if self.start[i] is not None and time_ns >= self.end[i]:
+                closed.append(self._close(i))
+            if self.start[i] is None:
+                if time_ns < self.end[i]:
+                    continue  # Late tick for a bar that is already closed
+                start = time_ns - time_ns % period
+                self.start[i] = start
+                self.end[i] = start + period
+                self.open[i] = self.high[i] = self.low[i] = self.close[i] = bid
+                self.ask[i] = ask
+                self.ticks[i] = 1
+                self.volume[i] = volume
+                continue
+            if bid > self.high[i]:
+                self.high[i] = bid
+            elif bid < self.low[i]:
+                self.low[i] = bid
+            self.close[i] = bid
+            self.ask[i] = ask
+            self.ticks[i] += 1
+            self.volume[i] += volume
+        return closed
+
+    def close_due(self, now_ns):
+        return [self._close(i) for i in range(len(self.periods))
+                if self.start[i] is not None and now_ns >= self.end[i]]
+
+    def current(self, timeframe):
+        i = self.timeframes.index(timeframe)
+        return None if self.start[i] is None else self._bar(i)
+
+    def seed(self, timeframe, history, forming=None):
+        # Restore completed bars (column arrays, oldest first) and the still-forming bar
+        i = self.timeframes.index(timeframe)
+        for k in range(len(history['time'])):
+            self.history[timeframe].append({name: column[k] for name, column in history.items()})
+        if len(history['time']):
+            self.end[i] = max(self.end[i], int(history['time'][-1]) + self.periods[i])
+        if forming is not None:
+            self.start[i] = forming['time']
+            self.end[i] = forming['time'] + self.periods[i]
+            self.open[i], self.high[i], self.low[i] = forming['open'], forming['high'], forming['low']
+            self.close[i], self.ask[i] = forming['close'], forming['ask']
+            self.ticks[i], self.volume[i] = forming['ticks'], forming['volume']
+
+class LatencyRecorder:
+    # HDR-style log-linear histogram of nanosecond latencies: exact below 128ns, then 64 linear
+    # sub-buckets per power of two, so any value is reported within 1.6%. record() is a few
+    # integer ops on a list; two threads recording at once may rarely lose an increment.
+    _upper_edges = None
+
     def __init__(self):
-        self.quote_sock = None
-        self.trade_sock = None
-        self.context = ssl.create_default_context()
-        self.quote_seq_num = 1
-        self.trade_seq_num = 1
-        self.quote_last_heartbeat = time.time()
-        self.trade_last_heartbeat = time.time()
-        self.quotes = {pair: [] for pair in symbol_id_map.keys()}  # H4 candles
-        self.current_ticks = {pair: pd.DataFrame(columns=['time', 'bid', 'ask']) 
-                            for pair in symbol_id_map.keys()}
-        self.last_signal_times = {pair: datetime.datetime.min.replace(tzinfo=datetime.UTC) 
-                               for pair in symbol_id_map.keys()}
-        self.active_positions = {}
+        self.counts = [0] * (128 + 57 * 64)
+        self.count = 0
+        self.total_ns = 0
+
+    def record(self, elapsed_ns):
+        if elapsed_ns < 128:
+            index = elapsed_ns if elapsed_ns > 0 else 0
+        else:
+            shift = elapsed_ns.bit_length() - 7
+            index = (shift << 6) + (elapsed_ns >> shift)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+
+    @classmethod
+    def upper_edges(cls):
+        if cls._upper_edges is None:
+            index = np.arange(128 + 57 * 64, dtype=np.int64)
+            shift = np.maximum(index // 64 - 1, 0)
+            mantissa = np.where(index < 128, index, index % 64 + 64)
+            cls._upper_edges = np.where(index < 128, index, ((mantissa + 1) << shift) - 1)
+        return cls._upper_edges
+
+    def percentiles(self, qs=(50, 90, 99, 99.9)):
+        if not self.count:
+            return {}
+        cumulative = np.cumsum(self.counts)
+        ranks = np.maximum(np.ceil(np.asarray(qs) / 100 * cumulative[-1]), 1)
+        values = self.upper_edges()[np.searchsorted(cumulative, ranks)]
+        return {q: v / 1000 for q, v in zip(qs, values.tolist())}  # Microseconds
+
+class TimedLock:
+    # Lock that records how long each acquire waited
+    __slots__ = ('lock', 'waits')
+
+    def __init__(self, waits):
         self.lock = Lock()
-        self.signal_queue = Queue()
-        self.last_processed_h4_start = {pair: None for pair in symbol_id_map.keys()}
+        self.waits = waits
 
-    def connect(self, host, port, label):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock = self.context.wrap_socket(sock, server_hostname=host)
-        sock.settimeout(15)
-        try:
-            sock.connect((host, port))
-            print(f"[CONNECTION] {label} connected to {host}:{port}")
-            return sock
-        except Exception as e:
-            print(f"[ERROR] {label} connection failed: {e}")
-            raise
+    def __enter__(self):
+        if self.lock.acquire(False):
+            waits = self.waits  # Uncontended: a zero-wait sample without reading the clock
+            waits.counts[0] += 1
+            waits.count += 1
+            return self
+        start = time.perf_counter_ns()
+        self.lock.acquire()
+        self.waits.record(time.perf_counter_ns() - start)
+        return self
 
-    def get_timestamp(self):
-        return datetime.datetime.now(datetime.UTC).strftime("%Y%m%d-%H:%M:%S.%f")[:-3]
+    def __exit__(self, *exc):
+        self.lock.release()
 
-    def calculate_checksum(self, message):
-        total = sum(ord(c) for c in message) % 256
-        return f"{total:03d}"
+class Counter:
+    __slots__ = ('value',)
 
-    def create_fix_message(self, msg_type, fields, sender_comp_id, target_comp_id, sender_sub_id, seq_num):
-        utc_time = self.get_timestamp()
-        body = (
-            f"35={msg_type}|"
-            f"49={sender_comp_id}|"
-            f"56={target_comp_id}|"
-            f"34={seq_num}|"
-            f"52={utc_time}|"
-            f"57={sender_sub_id}|"
-            f"50={sender_sub_id}|"
-            + fields
-        )
-        body_length = len(body.replace("|", "\x01"))
-        header = f"8={FIX_VERSION}|9={body_length}|"
-        message = header + body
-        checksum = self.calculate_checksum(message.replace("|", "\x01"))
-        return f"{message}10={checksum}|"
+    def __init__(self):
+        self.value = 0
 
-    def send_message(self, sock, msg, label):
-        try:
-            sock.send(msg.replace("|", "\x01").encode())
-            print(f"[SENT] {label}: {msg}")
-        except Exception as e:
-            print(f"[ERROR] {label} send failed: {e}")
-            raise
+class Metrics:
+    # Per-stage latency histograms, per-lock wait histograms, counters and gauges, exposed as
+    # Prometheus text on a localhost port and printed by report(). recv, parse and the
+    # dispatcher's subscribers are measured from the socket read (tick-to-stage); bar_close,
+    # encode and send are the stage's own duration. The hot path only calls record() and bumps
+    # Counter.value on objects fetched once up front.
+    def __init__(self):
+        self.stages = {}
+        self.lock_waits = {}
+        self.counters = {}
+        self.gauges = {}
+        self.server = None
 
-    def receive_message(self, sock, label):
-        try:
-            data = sock.recv(4096)
-            if not data:
-                print(f"[INFO] {label}: No data received")
-                return ""
-            decoded = data.decode('utf-8', errors='ignore').replace("\x01", "|")
-            print(f"[RECEIVED] {label}: {decoded}")
-            return decoded
-        except socket.timeout:
-            print(f"[INFO] {label}: Timeout - no data after 15 seconds")
-            return ""
-        except Exception as e:
-            print(f"[ERROR] {label} receive failed: {e}")
-            return ""
-
-    def connect_quote_session(self):
-        try:
-            self.quote_sock = self.connect(QUOTE_HOST, QUOTE_PORT, "Quotes")
-            logon_msg = self.create_fix_message(
-                "A",
-                f"98=0|108={HEARTBEAT_INTERVAL}|553={QUOTE_ACCOUNT_NUMBER}|554={QUOTE_PASSWORD}|",
-                QUOTE_SENDER_COMP_ID, QUOTE_TARGET_COMP_ID, QUOTE_SENDER_SUB_ID, self.quote_seq_num
-            )
-            self.send_message(self.quote_sock, logon_msg, "Quotes")
-            self.quote_seq_num += 1
+    def stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = LatencyRecorder()
+        return self.stages[name]
 
-            msg = self.receive_message(self.quote_sock, "Quotes")
-            if "35=A" in msg:
-                print("[INFO] Quotes logon successful")
-            else:
-                print("[ERROR] Quotes logon failed")
+    def lock(self, name):
+        if name not in self.lock_waits:
+            self.lock_waits[name] = LatencyRecorder()
+        return TimedLock(self.lock_waits[name])
+
+    def counter(self, name, labels=()):
+        key = (name, labels)
+        if key not in self.counters:
+            self.counters[key] = Counter()
+        return self.counters[key]
+
+    def gauge(self, name, read):
+        self.gauges[name] = read
+
+    @staticmethod
+    def _labels(pairs):
+        return "{" + ",".join(f'{k}="{v.decode() if isinstance(v, bytes) else v}"' for k, v in pairs) + "}" if pairs else ""
+
+    def render(self):
+        lines = []
+        for metric, label, recorders in (("fixapi_stage_latency_seconds", "stage", self.stages),
+                                         ("fixapi_lock_wait_seconds", "lock", self.lock_waits)):
+            lines.append(f"# TYPE {metric} summary")
+            for name, recorder in list(recorders.items()):
+                for q, us in recorder.percentiles().items():
+                    lines.append(f'{metric}{{{label}="{name}",quantile="{q / 100:g}"}} {us / 1e6:.9f}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {recorder.total_ns / 1e9:.9f}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {recorder.count}')
+        seen = set()
+        for (name, labels), counter in sorted(list(self.counters.items()), key=lambda item: item[0][0]):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE fixapi_{name}_total counter")
+            lines.append(f"fixapi_{name}_total{self._labels(labels)} {counter.value}")
+        for name, read in list(self.gauges.items()):
+            lines.append(f"# TYPE fixapi_{name} gauge")
+            lines.append(f"fixapi_{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+    def report(self):
+        for kind, recorders in (("stage", self.stages), ("lock", self.lock_waits)):
+            for name, recorder in list(recorders.items()):
+                pct = recorder.percentiles()
+                if pct:
+                    print(f"[METRICS] {kind} {name}: p50={pct[50]:.1f}us p90={pct[90]:.1f}us p99={pct[99]:.1f}us "
+                          f"p99.9={pct[99.9]:.1f}us ({recorder.count} events)")
+        counters = ", ".join(f"{name}{self._labels(labels)}={counter.value}"
+                             for (name, labels), counter in list(self.counters.items()))
+        gauges = ", ".join(f"{name}={read()}" for name, read in list(self.gauges.items()))
+        print(f"[METRICS] {counters}{', ' if counters and gauges else ''}{gauges}")
+
+    def serve(self, port=METRICS_PORT, host="127.0.0.1"):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"[INFO] Metrics on http://{host}:{self.server.server_port}/metrics")
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+class CoalescingMailbox:
+    # Holds only the latest item per key, so a slow consumer skips stale ticks instead of queueing them
+    def __init__(self):
+        self.cond = Condition()
+        self.latest = {}
+        self.coalesced = 0
+
+    def put(self, key, item):
+        with self.cond:
+            if key in self.latest:
+                self.coalesced += 1
+            self.latest[key] = item
+            self.cond.notify()
+
+    def drain(self, timeout=None):
+        with self.cond:
+            if not self.latest:
+                self.cond.wait(timeout)
+            items, self.latest = self.latest, {}
+        return items
+
+class TickDispatcher:
+    # Pushes each parsed tick to subscribers. Inline subscribers run on the receiving thread in
+    # subscription order; mailbox subscribers are drained by their own thread with coalescing.
+    def __init__(self, latency=None):
+        self.inline = []
+        self.mailboxes = {}
+        self.latency = {} if latency is None else latency  # May be shared with Metrics.stages
+        self.names = []
+
+    def subscribe(self, name, callback):
+        self.names.append(name)
+        self.inline.append((name, callback, self.latency.setdefault(name, LatencyRecorder())))
+
+    def subscribe_mailbox(self, name):
+        self.names.append(name)
+        self.latency.setdefault(name, LatencyRecorder())
+        mailbox = self.mailboxes[name] = CoalescingMailbox()
+        return mailbox
+
+    def publish(self, instrument, time_ns, bid, ask, recv_ns=None):
+        if recv_ns is None:
+            recv_ns = time.perf_counter_ns()
+        for name, callback, latency in self.inline:
+            callback(instrument, time_ns, bid, ask)
+            latency.record(time.perf_counter_ns() - recv_ns)
+        if self.mailboxes:
+            tick = (time_ns, bid, ask, recv_ns)
+            for mailbox in self.mailboxes.values():
+                mailbox.put(instrument, tick)
+
+    def report(self):
+        for name in self.names:
+            latency = self.latency[name]
+            pct = latency.percentiles()
+            if pct:
+                coalesced = self.mailboxes[name].coalesced if name in self.mailboxes else 0
+                print(f"[LATENCY] {name}: tick-to-decision p50={pct[50]:.1f}us p90={pct[90]:.1f}us "
+                      f"p99={pct[99]:.1f}us p99.9={pct[99.9]:.1f}us ({latency.count} ticks, {coalesced} coalesced)")
+
+TICK_COLUMNS = (('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'))
+BAR_COLUMNS = tuple((name, '<i8' if name in ('time', 'ticks') else '<f8') for name in BAR_FIELDS)
+
+class TickArchive:
+    # Append-only columnar archive: <root>/<instrument>/<YYYYMMDD>.<time|bid|ask> for ticks and
+    # <root>/<instrument>/bars_<TF>.<field> for closed bars, raw little-endian values. record()
+    # only appends to a deque; a background thread, started by the first record if not before,
+    # batches and writes. Reads are numpy.memmap slices, so history loads without copying and
+    # ranges touch only the pages they need.
+    def __init__(self, root=ARCHIVE_DIR, flush_interval=1.0):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.pending_ticks = deque()
+        self.pending_bars = deque()
+        self.handles = {}
+        self.flush_lock = Lock()
+        self.start_lock = Lock()
+        self.stopped = None
+        self.writer = None
+
+    def start(self):
+        with self.start_lock:
+            if self.writer is None:
+                self.stopped = Event()
+                self.writer = Thread(target=self._run, daemon=True)
+                self.writer.start()
+                atexit.register(self.close)
+
+    def close(self):
+        if self.writer is not None:
+            self.stopped.set()
+            self.writer.join()
+            self.writer = None
+            atexit.unregister(self.close)
+        self.flush()
+        for handle in self.handles.values():
+            handle.close()
+        self.handles.clear()
+
+    def record(self, instrument, time_ns, bid, ask):
+        if self.writer is None:
+            self.start()
+        self.pending_ticks.append((instrument, time_ns, bid, ask))
+
+    def record_bar(self, instrument, timeframe, bar):
+        if self.writer is None:
+            self.start()
+        self.pending_bars.append((instrument, timeframe, bar))
+
+    def _run(self):
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR] Archive write failed: {e}")
+
+    def _path(self, instrument, name):
+        return os.path.join(self.root, instrument, name)
+
+    @staticmethod
+    def day_name(time_ns):
+        return datetime.datetime.fromtimestamp(time_ns // DAY_NS * 86400, datetime.UTC).strftime("%Y%m%d")
+
+    def _append(self, path, array):
+        handle = self.handles.get(path)
+        if handle is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handle = self.handles[path] = open(path, 'ab')
+        handle.write(array.tobytes())
+        handle.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            by_instrument = {}
+            while self.pending_ticks:
+                instrument, time_ns, bid, ask = self.pending_ticks.popleft()
+                by_instrument.setdefault(instrument, []).append((time_ns, bid, ask))
+            for instrument, rows in by_instrument.items():
+                times = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+                prices = np.array([(row[1], row[2]) for row in rows], dtype=np.float64)
+                days = times // DAY_NS
+                cuts = np.flatnonzero(days[1:] != days[:-1]) + 1
+                for lo, hi in zip(np.concatenate(([0], cuts)), np.concatenate((cuts, [len(rows)]))):
+                    day = self.day_name(int(times[lo]))
+                    stale = [path for path in self.handles
+                             if os.path.dirname(path) == os.path.join(self.root, instrument)
+                             and not os.path.basename(path).startswith(("bars_", day))]
+                    for path in stale:
+                        self.handles.pop(path).close()
+                    self._append(self._path(instrument, f"{day}.time"), times[lo:hi])
+                    self._append(self._path(instrument, f"{day}.bid"), prices[lo:hi, 0])
+                    self._append(self._path(instrument, f"{day}.ask"), prices[lo:hi, 1])
+            while self.pending_bars:
+                instrument, timeframe, bar = self.pending_bars.popleft()
+                for name, dtype in BAR_COLUMNS:
+                    self._append(self._path(instrument, f"bars_{timeframe}.{name}"), np.array([bar[name]], dtype=dtype))
+
+    def _map(self, path, dtype):
+        itemsize = np.dtype(dtype).itemsize
+        n = os.path.getsize(path) // itemsize if os.path.exists(path) else 0
+        if not n:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(n,))
+
+    def _columns(self, instrument, stem, columns):
+        mapped = [self._map(self._path(instrument, f"{stem}.{name}"), dtype) for name, dtype in columns]
+        n = min(len(column) for column in mapped)  # A crash can leave one column a row ahead
+        return [column[:n] for column in mapped]
+
+    def days(self, instrument):
+        directory = os.path.join(self.root, instrument)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(directory) if name.endswith(".time") and not name.startswith("bars_"))
+
+    def read_day(self, instrument, day):
+        return tuple(self._columns(instrument, day, TICK_COLUMNS))
+
+    def iter_range(self, instrument, start_ns=None, end_ns=None):
+        # (time, bid, ask) memmap slices, one per day file, for start_ns <= time < end_ns
+        first = self.day_name(start_ns) if start_ns is not None else None
+        last = self.day_name(end_ns) if end_ns is not None else None
+        for day in self.days(instrument):
+            if (first and day < first) or (last and day > last):
+                continue
+            times, bids, asks = self.read_day(instrument, day)
+            lo = 0 if start_ns is None else int(np.searchsorted(times, start_ns, side='left'))
+            hi = len(times) if end_ns is None else int(np.searchsorted(times, end_ns, side='left'))
+            if hi > lo:
+                yield times[lo:hi], bids[lo:hi], asks[lo:hi]
+
+    def load_range(self, instrument, start_ns=None, end_ns=None):
+        chunks = list(self.iter_range(instrument, start_ns, end_ns))
+        if len(chunks) == 1:
+            return chunks[0]
+        if not chunks:
+            return tuple(np.empty(0, dtype=dtype) for _, dtype in TICK_COLUMNS)
+        return tuple(np.concatenate(columns) for columns in zip(*chunks))
+
+    def read_bars(self, instrument, timeframe, last=None):
+        columns = self._columns(instrument, f"bars_{timeframe}", BAR_COLUMNS)
+        if last is not None:
+            columns = [column[-last:] for column in columns]
+        return dict(zip(BAR_FIELDS, columns))
+
+class TelegramNotifier:
+    # Non-blocking Telegram delivery. notify() appends to a bounded deque and returns; a
+    # background thread, started by the first notify() if not before, waits coalesce_window after the first message of a burst, joins
+    # everything pending into one sendMessage and posts it over a keep-alive requests.Session
+    # with timeouts and exponential backoff. On overflow the newest message is dropped and the
+    # next send starts with a count of what was lost. base_url can point at a local stub.
+    MAX_TEXT = 4096
+
+    def __init__(self, token=None, chat_id=None, base_url="https://api.telegram.org",
+                 max_pending=256, coalesce_window=0.5, timeout=(3.05, 10), retries=3, backoff=0.5):
+        self.url = f"{base_url.rstrip('/')}/bot{token or TELEGRAM_BOT_TOKEN}/sendMessage"
+        self.chat_id = chat_id or TELEGRAM_CHAT_ID
+        self.max_pending = max_pending
+        self.coalesce_window = coalesce_window
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pending = deque()
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self.lock = Lock()
+        self.start_lock = Lock()
+        self.wakeup = Event()
+        self.stopped = None
+        self.worker = None
+        self.session = None
+
+    def start(self):
+        with self.start_lock:
+            if self.worker is None:
+                self.stopped = Event()
+                self.worker = Thread(target=self._run, daemon=True)
+                self.worker.start()
+                atexit.register(self.close)
+
+    def close(self, timeout=5):
+        if self.worker is not None:
+            self.stopped.set()
+            self.wakeup.set()
+            self.worker.join(timeout)
+            self.worker = None
+            atexit.unregister(self.close)
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def notify(self, message):
+        with self.lock:
+            if len(self.pending) >= self.max_pending:
+                self.dropped += 1
                 return False
+            self.pending.append(message)
+        if self.worker is None:
+            self.start()
+        self.wakeup.set()
+        return True
+
+    def _take_batch(self):
+        with self.lock:
+            messages = list(self.pending)
+            self.pending.clear()
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            messages.insert(0, f"_{dropped} notification(s) dropped_")
+        return messages
+
+    def _chunks(self, messages):
+        # Telegram caps a message at 4096 characters; split on message boundaries
+        chunk = ""
+        for message in messages:
+            message = message[:self.MAX_TEXT]
+            if chunk and len(chunk) + 2 + len(message) > self.MAX_TEXT:
+                yield chunk
+                chunk = ""
+            chunk = f"{chunk}\n\n{message}" if chunk else message
+        if chunk:
+            yield chunk
+
+    def _post(self, text):
+        payload = {"chat_id": self.chat_id, "text": text, "parse_mode": "Markdown"}
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                if response.status_code < 400:
+                    self.sent += 1
+                    return True
+                if response.status_code == 429:
+                    delay = max(delay, response.json().get("parameters", {}).get("retry_after", 0))
+                elif response.status_code < 500:
+                    print(f"[ERROR] Telegram rejected message: {response.status_code} {response.text[:200]}")
+                    break
+            except requests.RequestException as e:
+                print(f"[ERROR] Telegram send error: {e}")
+            if attempt < self.retries and not self.stopped.wait(delay):
+                continue
+            break
+        self.failed += 1
+        return False
+
+    def _run(self):
+        # requests is imported here, on the worker, so start() costs nothing on the startup path
+        self.session = requests.Session()
+        self.session.mount(self.url, requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        while not self.stopped.is_set():
+            self.wakeup.wait()
+            self.wakeup.clear()
+            self.stopped.wait(self.coalesce_window)
+            for text in self._chunks(self._take_batch()):
+                self._post(text)
+        for text in self._chunks(self._take_batch()):
+            self._post(text)
 
-            for instrument, symbol_id in symbol_id_map.items():
-                md_req_id = f"MD_{instrument}_{int(time.time())}"
-                subscribe_msg = self.create_fix_message(
-                    "V",
-                    f"262={md_req_id}|263=1|264=1|265=0|267=2|269=0|269=1|146=1|55={symbol_id}|",
-                    QUOTE_SENDER_COMP_ID, QUOTE_TARGET_COMP_ID, QUOTE_SENDER_SUB_ID, self.quote_seq_num
-                )
-                self.send_message(self.quote_sock, subscribe_msg, "Quotes")
-                self.quote_seq_num += 1
+class AsyncLogger:
+    # Leveled logging off the hot path. Callers append a (format, args) tuple to a deque, which
+    # is atomic and lock-free; a background thread does the formatting and writing in batches.
+    # FIX traffic goes to the session, market_data or orders category by MsgType, market data
+    # text is rate limited to md_rate lines per second, and an optional binary journal keeps
+    # every raw message as <time_ns, direction, label length, message length, label, message>.
+    LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "OFF": 100}
+    CATEGORIES = {b"W": "market_data", b"V": "market_data", b"X": "market_data", b"Y": "market_data",
+                  b"D": "orders", b"F": "orders", b"G": "orders", b"8": "orders", b"9": "orders", b"j": "orders"}
+    JOURNAL_RECORD = struct.Struct("<qBBI")
+
+    def __init__(self, levels=None, stream=None, journal_path=FIX_JOURNAL, md_rate=MD_LOG_RATE, flush_interval=0.05):
+        levels = dict(LOG_LEVELS, **(levels or {}))
+        self.thresholds = {category: self.LEVELS[level] for category, level in levels.items()}
+        self.fix_enabled = {category: threshold <= self.LEVELS["DEBUG"] for category, threshold in self.thresholds.items()}
+        self.stream = stream or sys.stdout
+        self.md_rate = md_rate
+        self.md_second = 0
+        self.md_logged = 0
+        self.md_suppressed = 0
+        self.flush_interval = flush_interval
+        self.pending = deque()
+        self.pending_journal = deque()
+        self.journal = open(journal_path, 'ab') if journal_path else None
+        self.flush_lock = Lock()
+        self.start_lock = Lock()
+        self.stopped = None
+        self.writer = None
+
+    def start(self):
+        # Called on the first queued line or journal record, so a logger that never writes
+        # (or has every category OFF) never owns a thread
+        with self.start_lock:
+            if self.writer is None:
+                self.stopped = Event()
+                self.writer = Thread(target=self._run, daemon=True)
+                self.writer.start()
+                atexit.register(self.close)
+
+    def log(self, category, level, message, *args):
+        if self.thresholds[category] <= self.LEVELS[level]:
+            if self.writer is None:
+                self.start()
+            self.pending.append((message, args))
+
+    def info(self, category, message, *args):
+        self.log(category, "INFO", message, *args)
+
+    def error(self, category, message, *args):
+        self.log(category, "ERROR", message, *args)
+
+    def fix(self, direction, label, msg_type, raw):
+        # direction is "SENT" or "RECEIVED"; raw may be a view into a reused buffer
+        if self.journal is not None:
+            if self.writer is None:
+                self.start()
+            raw = bytes(raw)
+            self.pending_journal.append((time.time_ns(), direction == "SENT", label, raw))
+        category = self.CATEGORIES.get(msg_type, "session")
+        if not self.fix_enabled[category]:
+            return
+        if self.writer is None:
+            self.start()
+        if category == "market_data" and not self._sample():
+            return
+        self.pending.append(("[%s] %s: %s", (direction, label, bytes(raw))))
+
+    def _sample(self):
+        second = int(time.monotonic())
+        if second != self.md_second:
+            if self.md_suppressed:
+                self.pending.append(("[INFO] %d market data messages not logged", (self.md_suppressed,)))
+            self.md_second = second
+            self.md_logged = 0
+            self.md_suppressed = 0
+        if self.md_logged < self.md_rate:
+            self.md_logged += 1
             return True
-        except Exception as e:
-            print(f"[ERROR] Quotes connection failed: {e}")
+        self.md_suppressed += 1
+        return False
+
+    @staticmethod
+    def _format(message, args):
+        return message % tuple(fix_to_text(arg) if isinstance(arg, bytes) else arg for arg in args)
+
+    def flush(self):
+        with self.flush_lock:
+            lines = []
+            while self.pending:
+                lines.append(self._format(*self.pending.popleft()))
+            if lines:
+                self.stream.write("\n".join(lines) + "\n")
+                self.stream.flush()
+            records = []
+            while self.pending_journal:
+                time_ns, sent, label, raw = self.pending_journal.popleft()
+                label = label.encode()
+                records.append(self.JOURNAL_RECORD.pack(time_ns, sent, len(label), len(raw)) + label + raw)
+            if records and self.journal is not None:
+                self.journal.write(b"".join(records))
+                self.journal.flush()
+
+    def _run(self):
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR] Log write failed: {e}")
+
+    def close(self):
+        if self.writer is not None:
+            self.stopped.set()
+            self.writer.join()
+            self.writer = None
+            atexit.unregister(self.close)
+        self.flush()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    @classmethod
+    def read_journal(cls, path):
+        # Yields (time_ns, direction, label, raw) from a journal written by this logger
+        with open(path, 'rb') as f:
+            data = f.read()
+        pos, header = 0, cls.JOURNAL_RECORD
+        while pos + header.size <= len(data):
+            time_ns, sent, label_length, raw_length = header.unpack_from(data, pos)
+            pos += header.size
+            label = data[pos:pos + label_length].decode()
+            pos += label_length
+            yield time_ns, "SENT" if sent else "RECEIVED", label, data[pos:pos + raw_length]
+            pos += raw_length
+
+def fix_to_text(raw):
+    return bytes(raw).decode('utf-8', errors='ignore').replace("\x01", "|")
+
+_tag_patterns = {}
+
+def _tag_pattern(tag):
+    pattern = _tag_patterns.get(tag)
+    if pattern is None:
+        pattern = _tag_patterns[tag] = b"\x01%d=" % tag
+    return pattern
+
+class FixMessage:
+    # Read-only view of one framed message. Single tags are located with a C-level find on
+    # the raw bytes; the full tag index is only built if fields() is asked for.
+    __slots__ = ('raw', '_index')
+
+    def __init__(self, raw):
+        self.raw = raw if isinstance(raw, bytes) else bytes(raw)
+        self._index = None
+
+    @property
+    def msg_type(self):
+        return self.get(35)
+
+    def get(self, tag, default=None, start=0):
+        raw = self.raw
+        pattern = _tag_pattern(tag)
+        pos = raw.find(pattern, start)
+        if pos < 0:
+            return default
+        pos += len(pattern)
+        return raw[pos:raw.find(b"\x01", pos)]
+
+    def fields(self):
+        if self._index is None:
+            index = {}
+            for field in self.raw.split(b"\x01"):
+                tag, sep, value = field.partition(b"=")
+                if sep and tag not in index:
+                    index[tag] = value
+            self._index = index
+        return self._index
+
+    def group(self, count_tag, delimiter_tag, member_tags):
+        # Repeating group: entries start at each delimiter tag and collect member tags until the
+        # next delimiter or the first tag outside the group
+        raw = self.raw
+        pos = raw.find(_tag_pattern(count_tag))
+        if pos < 0:
+            return []
+        delimiter = b"%d" % delimiter_tag
+        members = {b"%d" % tag for tag in member_tags}
+        entries = []
+        entry = None
+        for field in raw[raw.find(b"\x01", pos + 1) + 1:].split(b"\x01"):
+            tag, _, value = field.partition(b"=")
+            if tag == delimiter:
+                entry = {delimiter_tag: value}
+                entries.append(entry)
+            elif entry is not None and tag in members:
+                entry[int(tag)] = value
+            elif entry is not None:
+                break
+        return entries
+
+class MarketDataSnapshot:
+    __slots__ = ('symbol_id', 'sending_time', 'bid', 'ask')
+
+    def __init__(self, symbol_id, sending_time, bid, ask):
+        self.symbol_id = symbol_id
+        self.sending_time = sending_time
+        self.bid = bid
+        self.ask = ask
+
+_MD_ENTRY = b"\x01269="
+_MD_PRICE = b"\x01270="
+
+def fix_msg_type(raw):
+    pos = raw.find(b"\x0135=")
+    if pos < 0:
+        return None
+    return raw[pos + 4:raw.find(b"\x01", pos + 4)]
+
+def parse_market_data(raw):
+    # One forward scan over a 35=W message: SendingTime and Symbol from the header/body, then
+    # the NoMDEntries group (269 type / 270 price) for best bid and offer
+    if not isinstance(raw, bytes):
+        raw = bytes(raw)
+    pos = raw.find(b"\x0152=")
+    sending_time = raw[pos + 4:raw.find(b"\x01", pos + 4)] if pos >= 0 else None
+    pos = raw.find(b"\x0155=")
+    if pos < 0:
+        pos = raw.find(b"\x01146=")
+        if pos < 0:
+            return None
+        symbol_id = raw[pos + 5:raw.find(b"\x01", pos + 5)]
+    else:
+        symbol_id = raw[pos + 4:raw.find(b"\x01", pos + 4)]
+    bid = ask = None
+    entry = raw.find(_MD_ENTRY, pos)
+    while entry >= 0:
+        entry_type = raw[entry + 5]
+        next_entry = raw.find(_MD_ENTRY, entry + 5)
+        price = raw.find(_MD_PRICE, entry + 5, next_entry if next_entry >= 0 else len(raw))
+        if price >= 0:
+            price += 5
+            value = float(raw[price:raw.find(b"\x01", price)])
+            if entry_type == 0x30:  # '0' Bid
+                if bid is None:
+                    bid = value
+            elif entry_type == 0x31:  # '1' Offer
+                if ask is None:
+                    ask = value
+        entry = next_entry
+    return MarketDataSnapshot(symbol_id, sending_time, bid, ask)
+
+_day_epoch_cache = {}
+
+def parse_fix_timestamp_ns(value):
+    # UTCTimestamp "YYYYMMDD-HH:MM:SS[.sss[sss[sss]]]" to epoch nanoseconds
+    day = value[:8]
+    base = _day_epoch_cache.get(day)
+    if base is None:
+        if len(_day_epoch_cache) > 64:
+            _day_epoch_cache.clear()
+        base = _day_epoch_cache[day] = calendar.timegm((int(day[:4]), int(day[4:6]), int(day[6:8]), 0, 0, 0))
+    seconds = base + int(value[9:11]) * 3600 + int(value[12:14]) * 60 + int(value[15:17])
+    frac = value[18:]
+    return seconds * 1_000_000_000 + (int(frac) * 10 ** (9 - len(frac)) if frac else 0)
+
+def build_symbol_index(symbol_map):
+    # Reverse map keyed by the raw tag-55 bytes so the hot path needs no int() or scan
+    return {str(symbol_id).encode(): instrument for instrument, symbol_id in symbol_map.items()}
+
+def fix_timestamp(clock):
+    return clock.now().strftime("%Y%m%d-%H:%M:%S.%f")[:-3]
+
+def fix_checksum(message):
+    total = sum(ord(c) for c in message) % 256
+    return f"{total:03d}"
+
+def create_fix_message(msg_type, fields, sender_comp_id, target_comp_id, sender_sub_id, seq_num, clock=None):
+    # Pipe-delimited text form of a message, as LiveTrader.create_fix_message builds it; needs no trader
+    utc_time = fix_timestamp(clock or SystemClock())
+    body = (
+        f"35={msg_type}|"
+        f"49={sender_comp_id}|"
+        f"56={target_comp_id}|"
+        f"34={seq_num}|"
+        f"52={utc_time}|"
+        f"57={sender_sub_id}|"
+        f"50={sender_sub_id}|"
+        + fields
+    )
+    body_length = len(body.replace("|", "\x01"))
+    header = f"8={FIX_VERSION}|9={body_length}|"
+    message = header + body
+    checksum = fix_checksum(message.replace("|", "\x01"))
+    return f"{message}10={checksum}|"
+
+class FixEncoder:
+    # Encodes outbound messages for one session straight to bytes in a reusable buffer. Static
+    # header segments (8, 49/56, 57/50) are pre-encoded along with their checksum contribution,
+    # SendingTime is re-rendered only when the millisecond changes, and only the variable bytes
+    # are summed for tag 10. The returned memoryview is valid until the next encode().
+    def __init__(self, sender_comp_id, target_comp_id, sender_sub_id, clock=None, capacity=4096):
+        self.clock = clock or SystemClock()
+        self.begin = f"8={FIX_VERSION}\x019=".encode()
+        self.comp_ids = f"49={sender_comp_id}\x0156={target_comp_id}\x0134=".encode()
+        self.sub_ids = f"\x0157={sender_sub_id}\x0150={sender_sub_id}\x01".encode()
+        self.static_sum = sum(self.begin) + sum(b"35=\x01") + sum(self.comp_ids) + sum(b"\x0152=") + sum(self.sub_ids)
+        self.static_length = len(b"35=\x01") + len(self.comp_ids) + len(b"\x0152=") + len(self.sub_ids)
+        self.buf = bytearray(capacity)
+        self.view = memoryview(self.buf)
+        self._second = None
+        self._second_prefix = b""
+        self._millis = None
+        self._timestamp = b""
+        self._timestamp_sum = 0
+
+    def timestamp(self):
+        millis = self.clock.now_ns() // 1_000_000
+        if millis != self._millis:
+            second = millis // 1000
+            if second != self._second:
+                self._second = second
+                self._second_prefix = time.strftime("%Y%m%d-%H:%M:%S.", time.gmtime(second)).encode()
+            self._millis = millis
+            self._timestamp = self._second_prefix + b"%03d" % (millis % 1000)
+            self._timestamp_sum = sum(self._timestamp)
+        return self._timestamp
+
+    def encode(self, msg_type, fields, seq_num):
+        # msg_type and fields are bytes; fields are SOH-terminated tag=value pairs
+        timestamp = self.timestamp()
+        seq = b"%d" % seq_num
+        body_length = self.static_length + len(msg_type) + len(seq) + len(timestamp) + len(fields)
+        length = b"%d\x01" % body_length
+        total = len(self.begin) + len(length) + body_length + 7
+        if total > len(self.buf):
+            self.buf = bytearray(total * 2)
+            self.view = memoryview(self.buf)
+        view = self.view
+        pos = 0
+        for part in (self.begin, length, b"35=", msg_type, b"\x01", self.comp_ids, seq, b"\x0152=", timestamp,
+                     self.sub_ids, fields):
+            end = pos + len(part)
+            view[pos:end] = part
+            pos = end
+        checksum = (self.static_sum + sum(length) + sum(msg_type) + sum(seq) + self._timestamp_sum + sum(fields)) % 256
+        view[pos:pos + 7] = b"10=%03d\x01" % checksum
+        return view[:pos + 7]
+
+    def send(self, sock, msg_type, fields, seq_num):
+        # Blocking sockets: one sendall per message
+        sock.sendall(self.encode(msg_type, fields, seq_num))
+
+class InstrumentBook:
+    # Struct-of-arrays state for every traded instrument, indexed by a dense slot: latest quote,
+    # the latest closed H4 bar (each slot's signal state keeps the `lookback` bars before it)
+    # and the open position. Signal and exit rules then run over all instruments in one NumPy
+    # pass. Bar fields carry a per-slot seqlock version (odd while a write is in progress) so
+    # vectorized readers can skip half-written slots without locking.
+    def __init__(self, symbols, params):
+        self.instruments = list(symbols)
+        self.slot = {instrument: i for i, instrument in enumerate(self.instruments)}
+        n = len(self.instruments)
+        self.symbol_id = np.array([symbols[instrument] for instrument in self.instruments], dtype=np.int64)
+        self.signal_state = []
+        for instrument in self.instruments:
+            pair = params[instrument]
+            state = signal_rule(pair)[1]
+            self.signal_state.append(state(pair['tolerance'] * pair['pip_value'], pair.get('lookback', 1)))
+        self.last_time = np.zeros(n, dtype=np.int64)
+        self.bid = np.zeros(n)
+        self.ask = np.zeros(n)
+        self.buy = np.zeros(n, dtype=bool)
+        self.sell = np.zeros(n, dtype=bool)
+        self.bar_bid = np.zeros(n)
+        self.bar_ask = np.zeros(n)
+        self.bar_time = np.zeros(n, dtype=np.int64)
+        self.bar_count = np.zeros(n, dtype=np.int64)
+        self.bar_version = np.zeros(n, dtype=np.int64)
+        self.side = np.zeros(n, dtype=np.int8)  # 1 BUY, -1 SELL, 0 flat
+        self.sl = np.zeros(n)
+        self.tp = np.zeros(n)
+        # Range of the closing quote since the last exit check; lists, since they change on every tick
+        self.exit_low = [math.inf] * n
+        self.exit_high = [-math.inf] * n
+
+    def update_quote(self, slot, time_ns, bid, ask):
+        self.last_time[slot] = time_ns
+        self.bid[slot] = bid
+        self.ask[slot] = ask
+        side = self.side[slot]
+        if side:
+            quote = bid if side > 0 else ask
+            if quote < self.exit_low[slot]:
+                self.exit_low[slot] = quote
+            if quote > self.exit_high[slot]:
+                self.exit_high[slot] = quote
+
+    def exits_checked(self, slot):
+        self.exit_low[slot] = math.inf
+        self.exit_high[slot] = -math.inf
+
+    def push_bar(self, slot, bar):
+        # The slot's signal rule runs once per closed bar; scans only read its flags
+        buy, sell = self.signal_state[slot].update(bar['open'], bar['high'], bar['low'], bar['close'])
+        self.bar_version[slot] += 1
+        self.buy[slot] = buy
+        self.sell[slot] = sell
+        self.bar_bid[slot] = bar['bid']
+        self.bar_ask[slot] = bar['ask']
+        self.bar_time[slot] = bar['time']
+        self.bar_count[slot] += 1
+        self.bar_version[slot] += 1
+
+    def open_position(self, slot, side, sl, tp):
+        self.sl[slot] = sl
+        self.tp[slot] = tp
+        self.side[slot] = 1 if side == 'BUY' else -1
+        self.exits_checked(slot)
+
+    def close_position(self, slot):
+        self.side[slot] = 0
+
+    def signal_scan(self, slots=None):
+        # (slots, buy, sell) from each slot's signal rule on its latest closed H4 bar
+        idx = np.arange(len(self.instruments)) if slots is None else np.asarray(slots, dtype=np.int64)
+        version = self.bar_version[idx].copy()
+        buy, sell = self.buy[idx], self.sell[idx]
+        valid = (version == self.bar_version[idx]) & (version % 2 == 0) & (self.bar_count[idx] >= 2)
+        return idx, buy & valid, sell & valid
+
+    def exit_scan(self):
+        # Slots whose closing quote (bid for BUY, ask for SELL) has reached SL or TP on some tick
+        # since their last exit check, from the range update_quote keeps per slot
+        low, high = np.array(self.exit_low), np.array(self.exit_high)
+        hit = np.where(self.side == 1, (low <= self.sl) | (high >= self.tp), (high >= self.sl) | (low <= self.tp))
+        return np.flatnonzero(hit & (self.side != 0))
+
+REJECT_TYPES = (b"3", b"9", b"j")  # Session reject, OrderCancelReject, BusinessMessageReject
+
+ORD_STATUS = {b"0": "NEW", b"1": "PARTIALLY_FILLED", b"2": "FILLED", b"3": "DONE_FOR_DAY", b"4": "CANCELED",
+              b"5": "REPLACED", b"6": "PENDING_CANCEL", b"8": "REJECTED", b"A": "PENDING_NEW", b"C": "EXPIRED",
+              b"E": "PENDING_REPLACE"}
+TERMINAL_STATUS = {"FILLED", "DONE_FOR_DAY", "CANCELED", "REJECTED", "EXPIRED"}
+
+def base36(value):
+    digits = ""
+    while True:
+        value, digit = divmod(value, 36)
+        digits = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"[digit] + digits
+        if not value:
+            return digits
+
+class Order:
+    __slots__ = ('cl_ord_id', 'instrument', 'side', 'quantity', 'sl', 'tp', 'signal_time', 'status', 'order_id',
+                 'cum_qty', 'leaves_qty', 'avg_px', 'text', 'sent_ns', 'updated_ns', 'exec_ids', 'aliases')
+
+    def __init__(self, cl_ord_id, instrument, side, quantity, sl, tp, signal_time, sent_ns):
+        self.cl_ord_id = cl_ord_id
+        self.instrument = instrument
+        self.side = side
+        self.quantity = quantity
+        self.sl = sl
+        self.tp = tp
+        self.signal_time = signal_time
+        self.status = "PENDING_NEW"
+        self.order_id = None
+        self.cum_qty = 0.0
+        self.leaves_qty = quantity
+        self.avg_px = 0.0
+        self.text = None
+        self.sent_ns = sent_ns
+        self.updated_ns = sent_ns
+        self.exec_ids = set()
+        self.aliases = []  # ClOrdIDs of cancel requests, which reports may quote instead
+
+class OrderManager:
+    # ClOrdID -> Order for everything this process sent, plus the working ClOrdIDs per
+    # instrument. ClOrdIDs are <process start in ms, base 36>-<n>, so they never collide within a
+    # second or across restarts. ExecutionReports and OrderCancelRejects are applied in O(1) by
+    # ClOrdID (duplicate ExecIDs are ignored); finished orders are kept for `history` more
+    # finished orders and then evicted.
+    def __init__(self, history=10000, clock=None):
+        self.clock = clock or SystemClock()
+        self.prefix = base36(time.time_ns() // 1_000_000).encode()
+        self.sequence = itertools.count(1)
+        self.orders = {}
+        self.working = {}
+        self.finished = deque()
+        self.history = history
+
+    def new_order(self, instrument, side, quantity, sl, tp, signal_time=None):
+        cl_ord_id = b"%s-%d" % (self.prefix, next(self.sequence))
+        order = Order(cl_ord_id, instrument, side, quantity, sl, tp, signal_time, self.clock.now_ns())
+        self.orders[cl_ord_id] = order
+        self.working.setdefault(instrument, set()).add(cl_ord_id)
+        return order
+
+    def discard(self, order):
+        # Forgets an order that never reached the broker
+        working = self.working.get(order.instrument)
+        if working is not None:
+            working.discard(order.cl_ord_id)
+        for cl_ord_id in [order.cl_ord_id] + order.aliases:
+            self.orders.pop(cl_ord_id, None)
+
+    def working_orders(self, instrument):
+        return [self.orders[cl_ord_id] for cl_ord_id in self.working.get(instrument, ())]
+
+    def cancel(self, order):
+        # Registers a cancel request for order and returns its ClOrdID; the caller sends the 35=F
+        cancel_id = b"%s-%d" % (self.prefix, next(self.sequence))
+        order.aliases.append(cancel_id)
+        order.status = "PENDING_CANCEL"
+        self.orders[cancel_id] = order
+        return cancel_id
+
+    def _lookup(self, msg):
+        order = self.orders.get(msg.get(11))
+        if order is None:
+            order = self.orders.get(msg.get(41))
+        return order
+
+    def _finish(self, order):
+        working = self.working.get(order.instrument)
+        if working is not None:
+            working.discard(order.cl_ord_id)
+        self.finished.append(order)
+        while len(self.finished) > self.history:
+            old = self.finished.popleft()
+            for cl_ord_id in [old.cl_ord_id] + old.aliases:
+                self.orders.pop(cl_ord_id, None)
+
+    def on_execution_report(self, raw):
+        # Returns (order, last_qty, last_px), or None for unknown orders and duplicate reports
+        msg = FixMessage(raw)
+        order = self._lookup(msg)
+        if order is None or order.status in TERMINAL_STATUS:
+            return None
+        exec_id = msg.get(17)
+        if exec_id is not None:
+            if exec_id in order.exec_ids:
+                return None
+            order.exec_ids.add(exec_id)
+        order_id = msg.get(37)
+        if order_id:
+            order.order_id = order_id
+        last_qty = float(msg.get(32) or 0)
+        last_px = float(msg.get(31) or 0)
+        cum_qty = msg.get(14)
+        if cum_qty:
+            order.cum_qty = float(cum_qty)
+        elif last_qty:
+            order.cum_qty += last_qty
+        avg_px = float(msg.get(6) or 0)
+        if avg_px:
+            order.avg_px = avg_px
+        elif last_qty and order.cum_qty:
+            order.avg_px += (last_px - order.avg_px) * last_qty / order.cum_qty
+        leaves_qty = msg.get(151)
+        order.leaves_qty = float(leaves_qty) if leaves_qty else max(order.quantity - order.cum_qty, 0.0)
+        order.status = ORD_STATUS.get(msg.get(39), order.status)
+        text = msg.get(58)
+        if text is not None:
+            order.text = text.decode(errors='replace')
+        order.updated_ns = self.clock.now_ns()
+        if order.status in TERMINAL_STATUS:
+            self._finish(order)
+        return order, last_qty, last_px
+
+    def on_cancel_reject(self, raw):
+        # The order stays as the broker reports it in 39, usually still working
+        msg = FixMessage(raw)
+        order = self._lookup(msg)
+        if order is None:
+            return None
+        order.status = ORD_STATUS.get(msg.get(39), order.status if order.status != "PENDING_CANCEL" else "NEW")
+        text = msg.get(58)
+        if text is not None:
+            order.text = text.decode(errors='replace')
+        order.updated_ns = self.clock.now_ns()
+        if order.status in TERMINAL_STATUS:
+            self._finish(order)
+        return order
+
+class SessionStore:
+    # Next outbound and expected inbound MsgSeqNum for one session in a 64-byte memory-mapped
+    # file. Updates alternate between two checksummed slots and bump a generation counter, so
+    # a crash in the middle of a write leaves the previous slot to load. path=None keeps the
+    # same layout in memory.
+    RECORD = struct.Struct("<QQQ")  # generation, next outbound, next inbound; crc32 follows
+    SLOT = 32
+
+    def __init__(self, path=None):
+        self.path = path
+        self.file = None
+        if path is None:
+            self.map = bytearray(2 * self.SLOT)
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.file = open(path, 'a+b')
+            if os.path.getsize(path) < 2 * self.SLOT:
+                self.file.truncate(2 * self.SLOT)
+            self.map = mmap.mmap(self.file.fileno(), 2 * self.SLOT)
+        self.generation, self.outbound, self.inbound = self._load()
+
+    def _load(self):
+        best = (0, 1, 1)
+        for offset in (0, self.SLOT):
+            record = bytes(self.map[offset:offset + self.RECORD.size])
+            crc = int.from_bytes(self.map[offset + self.RECORD.size:offset + self.RECORD.size + 4], 'little')
+            generation, outbound, inbound = self.RECORD.unpack(record)
+            if generation > best[0] and crc == zlib.crc32(record):
+                best = (generation, outbound, inbound)
+        return best
+
+    def save(self, outbound, inbound):
+        self.generation += 1
+        offset = (self.generation & 1) * self.SLOT
+        record = self.RECORD.pack(self.generation, outbound, inbound)
+        self.map[offset:offset + self.RECORD.size] = record
+        self.map[offset + self.RECORD.size:offset + self.RECORD.size + 4] = zlib.crc32(record).to_bytes(4, 'little')
+        self.outbound = outbound
+        self.inbound = inbound
+
+    def reset(self):
+        self.save(1, 1)
+
+    def close(self):
+        if self.file is not None:
+            self.map.flush()
+            self.map.close()
+            self.file.close()
+            self.file = None
+
+class FramerProtocol(asyncio.BufferedProtocol):
+    # asyncio receives straight into the session's FixFramer buffer (no per-read bytes objects
+    # or feed copies). Also does the write-side flow control that drain() waits on.
+    def __init__(self, framer, min_free=4096):
+        self.framer = framer
+        self.min_free = min_free
+        self.transport = None
+        self.ready = False  # New bytes since the last receive()
+        self.eof = False
+        self.waiter = None
+        self.paused = False
+        self.drain_waiter = None
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def get_buffer(self, sizehint):
+        return self.framer.writable(max(sizehint, self.min_free))
+
+    def buffer_updated(self, nbytes):
+        self.framer.commit(nbytes)
+        self.ready = True
+        self._wake(self.waiter)
+
+    def eof_received(self):
+        self.eof = True
+        self._wake(self.waiter)
+        return False  # Let the transport close
+
+    def connection_lost(self, exc):
+        self.eof = True
+        self._wake(self.waiter)
+        if self.drain_waiter is not None and not self.drain_waiter.done():
+            self.drain_waiter.set_exception(ConnectionError("connection lost"))
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        self._wake(self.drain_waiter)
+
+    @staticmethod
+    def _wake(waiter):
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def receive(self):
+        # Waits until new bytes are in the framer; False once the peer has closed
+        while not self.ready:
+            if self.eof:
+                return False
+            self.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+        self.ready = False
+        return True
+
+    async def drain(self):
+        if self.transport.is_closing():
+            raise ConnectionError("connection lost")
+        if self.paused:
+            self.drain_waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self.drain_waiter
+            finally:
+                self.drain_waiter = None
+
+class AsyncFixSession:
+    # One FIX session on asyncio: a reader task feeding the framer, a timer task that sends
+    # Heartbeats exactly HeartBtInt after the last outbound message and a TestRequest after
+    # inbound silence, and an awaitable send(). Every call runs on the owning event loop, so
+    # sequence numbers and the writer need no locks. Both sequence numbers live in a
+    # SessionStore; an inbound gap triggers a ResendRequest, resent market data (PossDup) is
+    # dropped as stale, and the counterparty's ResendRequests are answered with a gap fill.
+    # Frames failing the checksum are skipped by the framer; messages whose session fields do
+    # not parse get a session Reject (35=3) rather than ending the session.
+    def __init__(self, label, host, port, sender_comp_id, target_comp_id, sender_sub_id, account_number, password,
+                 clock=None, ssl_context=None, on_message=None, on_logon=None, heartbeat_interval=HEARTBEAT_INTERVAL,
+                 metrics=None, logger=None, store=None, stale_on_resend=(b"W", b"X")):
+        self.label = label
+        self.host = host
+        self.port = port
+        self.sender_comp_id = sender_comp_id
+        self.target_comp_id = target_comp_id
+        self.sender_sub_id = sender_sub_id
+        self.account_number = account_number
+        self.password = password
+        self.encoder = FixEncoder(sender_comp_id, target_comp_id, sender_sub_id, clock)
+        self.ssl_context = ssl_context
+        self.on_message = on_message
+        self.on_logon = on_logon
+        self.heartbeat_interval = heartbeat_interval
+        self.metrics = metrics or Metrics()
+        self.logger = logger or AsyncLogger()
+        self.recv_latency = self.metrics.stage("recv")
+        self.encode_latency = self.metrics.stage("encode")
+        self.send_latency = self.metrics.stage("send")
+        self.message_counts = {}
+        self.rejects = self.metrics.counter("rejects", (("session", label),))
+        self.reconnects = self.metrics.counter("reconnects", (("session", label),))
+        self.store = store or SessionStore()
+        self.seq_num = self.store.outbound
+        self.expected_seq = self.store.inbound
+        self.resend_range = None
+        self.stale_on_resend = stale_on_resend
+        self.framer = FixFramer(verify_checksum=True)  # Corrupted frames are resynced past, not parsed
+        self.protocol = None
+        self.transport = None
+        self.logged_on = asyncio.Event()
+        self.last_sent = 0.0
+        self.last_received = 0.0
+        self.test_request_sent = None
+
+    async def send(self, msg_type, fields=b""):
+        # fields may be SOH-separated bytes (hot path) or the "|"-separated text used elsewhere
+        if self.transport is None:
+            raise ConnectionError(f"{self.label} session is not connected")
+        if isinstance(msg_type, str):
+            msg_type = msg_type.encode()
+        if isinstance(fields, str):
+            fields = fields.replace("|", "\x01").encode()
+        start = time.perf_counter_ns()
+        # The transport may hold on to unsent data past drain(), so it gets its own copy of the
+        # encoder's reusable buffer (FixEncoder.send with a blocking socket can write the view)
+        msg = bytes(self.encoder.encode(msg_type, fields, self.seq_num))
+        encoded = time.perf_counter_ns()
+        self.encode_latency.record(encoded - start)
+        self.seq_num += 1
+        self.store.save(self.seq_num, self.expected_seq)
+        self.transport.write(msg)
+        self.last_sent = time.monotonic()
+        self.logger.fix("SENT", self.label, msg_type, msg)
+        await self.protocol.drain()
+        self.send_latency.record(time.perf_counter_ns() - encoded)
+
+    async def _next_message(self):
+        while True:
+            raw = self.framer.next_message()
+            if raw is not None:
+                raw = bytes(raw)
+                self.logger.fix("RECEIVED", self.label, fix_msg_type(raw), raw)
+                return raw
+            if not await self.protocol.receive():
+                raise ConnectionError("connection closed by peer")
+            self.last_received = time.monotonic()
+
+    async def connect(self):
+        self.framer.reset()
+        protocol = FramerProtocol(self.framer)
+        self.transport, _ = await asyncio.wait_for(asyncio.get_running_loop().create_connection(
+            lambda: protocol, self.host, self.port, ssl=self.ssl_context,
+            server_hostname=self.host if self.ssl_context else None), LOGON_TIMEOUT)
+        self.protocol = protocol
+        self.logger.info("session", "[CONNECTION] %s connected to %s:%s", self.label, self.host, self.port)
+        self.test_request_sent = None
+        self.resend_range = None
+        await self.send("A", f"98=0|108={self.heartbeat_interval}|553={self.account_number}|554={self.password}|")
+        raw = await asyncio.wait_for(self._next_message(), LOGON_TIMEOUT)
+        if fix_msg_type(raw) != b"A":
+            text = FixMessage(raw).get(58, b"").decode(errors='replace')
+            self.logger.error("session", "[ERROR] %s logon failed: %s", self.label, text)
+            expecting = text.partition("expecting ")[2].split(" ")[0]
+            if expecting.isdigit():  # "MsgSeqNum too low, expecting N": resume from the counterparty's number
+                self.seq_num = int(expecting)
+                self.store.save(self.seq_num, self.expected_seq)
             return False
+        seq = self._msg_seq_num(raw)
+        if seq < self.expected_seq and FixMessage(raw).get(141) == b"Y":
+            # ResetSeqNumFlag: the counterparty restarted its numbering; anything else below the
+            # persisted number is a fatal regression and fails in _check_sequence
+            self.logger.info("session", "[INFO] %s: counterparty reset to MsgSeqNum %d (expected %d)",
+                             self.label, seq, self.expected_seq)
+            self.expected_seq = seq
+        self._check_sequence(raw, b"A")
+        self.logger.info("session", "[INFO] %s logon successful", self.label)
+        self.last_received = time.monotonic()
+        await self._request_resend()
+        if self.on_logon is not None:
+            await self.on_logon(self)
+        self.logged_on.set()
+        return True
+
+    async def _read_loop(self):
+        while True:
+            if not await self.protocol.receive():
+                self.logger.info("session", "[INFO] %s: No data received", self.label)
+                return
+            recv_ns = time.perf_counter_ns()
+            self.last_received = time.monotonic()
+            self.test_request_sent = None
+            for raw in self.framer.messages():
+                raw = bytes(raw)  # Handlers keep it, and the buffer may move while send() awaits
+                self.recv_latency.record(time.perf_counter_ns() - recv_ns)
+                msg_type = fix_msg_type(raw)
+                self.logger.fix("RECEIVED", self.label, msg_type, raw)
+                counter = self.message_counts.get(msg_type)
+                if counter is None:
+                    counter = self.message_counts[msg_type] = self.metrics.counter(
+                        "messages", (("session", self.label), ("type", msg_type)))
+                counter.value += 1
+                if msg_type in REJECT_TYPES or (msg_type == b"8" and b"\x01150=8\x01" in raw):
+                    self.rejects.value += 1
+                try:
+                    if not self._check_sequence(raw, msg_type):
+                        continue
+                    if msg_type == b"1":
+                        await self.send("0", f"112={FixMessage(raw).get(112, b'').decode()}|")
+                    elif msg_type == b"5":
+                        self.logger.info("session", "[INFO] %s: Logout received", self.label)
+                        return
+                    elif msg_type == b"2":
+                        await self._gap_fill(self._int_field(raw, 7))
+                    elif msg_type != b"0" and self.on_message is not None:
+                        self.on_message(raw, msg_type, recv_ns)
+                except ValueError as e:
+                    await self._reject(raw, msg_type, e)
+            if self.resend_range is not None:
+                await self._request_resend()
+
+    @staticmethod
+    def _msg_seq_num(raw):
+        pos = raw.find(b"\x0134=")
+        if pos < 0:
+            raise ValueError("MsgSeqNum(34) missing")
+        pos += 4
+        return int(raw[pos:raw.find(b"\x01", pos)])
 
-    def connect_trade_session(self):
+    @staticmethod
+    def _int_field(raw, tag):
+        value = FixMessage(raw).get(tag)
+        if value is None:
+            raise ValueError(f"Required tag {tag} missing")
+        return int(value)
+
+    async def _reject(self, raw, msg_type, error):
+        # A framed message whose session fields do not parse: session-level Reject (35=3) if it
+        # has a usable MsgSeqNum, otherwise dropped. Either way the session stays up.
         try:
-            self.trade_sock = self.connect(TRADE_HOST, TRADE_PORT, "Trading")
-            logon_msg = self.create_fix_message(
-                "A",
-                f"98=0|108={HEARTBEAT_INTERVAL}|553={TRADE_ACCOUNT_NUMBER}|554={TRADE_PASSWORD}|",
-                TRADE_SENDER_COMP_ID, TRADE_TARGET_COMP_ID, TRADE_SENDER_SUB_ID, self.trade_seq_num
-            )
-            self.send_message(self.trade_sock, logon_msg, "Trading")
-            self.trade_seq_num += 1
+            seq = self._msg_seq_num(raw)
+        except ValueError:
+            self.logger.error("session", "[ERROR] %s: dropped malformed message: %s", self.label, error)
+            return
+        self.logger.error("session", "[ERROR] %s: rejecting MsgSeqNum %d: %s", self.label, seq, error)
+        text = str(error).replace("|", "/")
+        await self.send("3", f"45={seq}|372={(msg_type or b'').decode(errors='replace')}|58={text}|")
 
-            msg = self.receive_message(self.trade_sock, "Trading")
-            if "35=A" in msg:
-                print("[INFO] Trading logon successful")
-                self.trade_last_heartbeat = time.time()
-            else:
-                print("[ERROR] Trading logon failed")
-                return False
-            return True
-        except Exception as e:
-            print(f"[ERROR] Trading connection failed: {e}")
+    def _check_sequence(self, raw, msg_type):
+        # True if the message should be processed; records gaps for _request_resend()
+        seq = self._msg_seq_num(raw)
+        expected = self.expected_seq
+        if msg_type == b"4":
+            msg = FixMessage(raw)
+            try:
+                new_seq = self._int_field(raw, 36)
+            except ValueError:
+                if seq == expected:  # Consumed like any other message; the caller rejects it
+                    self.expected_seq = seq + 1
+                    self.store.save(self.seq_num, seq + 1)
+                raise
+            if msg.get(123) != b"Y" or new_seq > expected:  # Reset mode always applies, a gap fill only forwards
+                self.expected_seq = new_seq
+                self.store.save(self.seq_num, new_seq)
             return False
+        if seq == expected:
+            self.expected_seq = seq + 1
+            self.store.save(self.seq_num, seq + 1)
+            return True
+        if seq > expected:
+            begin = expected if self.resend_range is None else min(self.resend_range[0], expected)
+            self.resend_range = (begin, seq - 1)
+            self.logger.info("session", "[INFO] %s: sequence gap, expected %d got %d", self.label, expected, seq)
+            self.expected_seq = seq + 1
+            self.store.save(self.seq_num, seq + 1)
+            return True
+        if b"\x0143=Y\x01" in raw:
+            return msg_type not in self.stale_on_resend
+        raise ConnectionError(f"MsgSeqNum too low: got {seq}, expected {expected}")
+
+    async def _request_resend(self):
+        if self.resend_range is not None:
+            begin, end = self.resend_range
+            self.resend_range = None
+            await self.send("2", f"7={begin}|16={end}|")
 
-    def send_heartbeat(self, sock, label, seq_num):
-        heartbeat_msg = self.create_fix_message("0", "", 
-            QUOTE_SENDER_COMP_ID if label == "Quotes" else TRADE_SENDER_COMP_ID,
-            QUOTE_TARGET_COMP_ID if label == "Quotes" else TRADE_TARGET_COMP_ID,
-            QUOTE_SENDER_SUB_ID if label == "Quotes" else TRADE_SENDER_SUB_ID,
-            seq_num
+    async def _gap_fill(self, begin):
+        # Sent messages are not stored, so every requested message is skipped with one SequenceReset-GapFill
+        msg = bytes(self.encoder.encode(b"4", b"43=Y\x01122=%s\x01123=Y\x0136=%d\x01"
+                                        % (self.encoder.timestamp(), self.seq_num), begin))
+        self.transport.write(msg)
+        self.last_sent = time.monotonic()
+        self.logger.fix("SENT", self.label, b"4", msg)
+        await self.protocol.drain()
+
+    def reconnect_delay(self, failures):
+        # Immediate first retry, then full-jitter exponential backoff
+        if failures <= 1:
+            return 0.0
+        base, cap = RECONNECT_BACKOFF
+        return random.uniform(0, min(cap, base * 2 ** (failures - 2)))
+
+    async def _heartbeat_loop(self):
+        interval = self.heartbeat_interval
+        while True:
+            now = time.monotonic()
+            heartbeat_due = self.last_sent + interval
+            if self.test_request_sent is None:
+                silence_due = self.last_received + interval + TEST_REQUEST_GRACE
+            else:
+                silence_due = self.test_request_sent + interval
+            due = min(heartbeat_due, silence_due)
+            if now < due:
+                await asyncio.sleep(due - now)
+                continue
+            if now >= silence_due:
+                if self.test_request_sent is not None:
+                    self.logger.error("session", "[ERROR] %s: No response to TestRequest", self.label)
+                    return
+                self.test_request_sent = now
+                await self.send("1", f"112=TEST_{int(time.time())}|")
+            elif now >= heartbeat_due:
+                await self.send("0")
+
+    async def close(self):
+        self.logged_on.clear()
+        transport, self.transport = self.transport, None
+        if transport is not None:
+            transport.close()
+            try:
+                await asyncio.wait_for(asyncio.shield(self.protocol.closed), LOGON_TIMEOUT)
+            except asyncio.TimeoutError:
+                transport.abort()
+
+    async def run(self):
+        # Connect, serve until the session drops, then reconnect
+        attempts = failures = 0
+        while True:
+            if attempts:
+                self.reconnects.value += 1
+            attempts += 1
+            try:
+                if await self.connect():
+                    failures = 0
+                    tasks = [asyncio.create_task(self._read_loop()), asyncio.create_task(self._heartbeat_loop())]
+                    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    for task in pending:
+                        task.cancel()
+                    for task in done:
+                        task.result()
+            except asyncio.CancelledError:
+                await self.close()
+                raise
+            except Exception as e:
+                self.logger.error("session", "[ERROR] %s session failed: %s", self.label, e)
+            await self.close()
+            failures += 1
+            await asyncio.sleep(self.reconnect_delay(failures))
+
+class LiveTrader:
+    def __init__(self, clock=None, archive=None, symbols=None, params=None, notifier=None, metrics=None,
+                 logger=None, state_dir=None):
+        self.clock = clock or SystemClock()
+        self.metrics = metrics or Metrics()
+        self.logger = logger or AsyncLogger()
+        self.archive = archive
+        self.notifier = notifier or TelegramNotifier()
+        self.symbols = symbols or symbol_id_map
+        self.params = params or pairs_params
+        self.context = ssl.create_default_context()
+        self.state_dir = state_dir
+        self.quote_session = AsyncFixSession(
+            "Quotes", QUOTE_HOST, QUOTE_PORT, QUOTE_SENDER_COMP_ID, QUOTE_TARGET_COMP_ID, QUOTE_SENDER_SUB_ID,
+            QUOTE_ACCOUNT_NUMBER, QUOTE_PASSWORD, self.clock, self.context,
+            on_message=self.on_quote_message, on_logon=self.subscribe_market_data, metrics=self.metrics,
+            logger=self.logger, store=self.session_store(QUOTE_SENDER_COMP_ID, QUOTE_TARGET_COMP_ID)
+        )
+        self.trade_session = AsyncFixSession(
+            "Trading", TRADE_HOST, TRADE_PORT, TRADE_SENDER_COMP_ID, TRADE_TARGET_COMP_ID, TRADE_SENDER_SUB_ID,
+            TRADE_ACCOUNT_NUMBER, TRADE_PASSWORD, self.clock, self.context,
+            on_message=self.on_trade_message, metrics=self.metrics, logger=self.logger,
+            store=self.session_store(TRADE_SENDER_COMP_ID, TRADE_TARGET_COMP_ID)
         )
-        self.send_message(sock, heartbeat_msg, label)
-        return seq_num + 1
+        self.quotes = {pair: [] for pair in self.symbols.keys()}  # H4 candles
+        self.current_ticks = {pair: TickStore() for pair in self.symbols.keys()}
+        self.last_signal_times = {pair: datetime.datetime.min.replace(tzinfo=datetime.UTC) 
+                               for pair in self.symbols.keys()}
+        self.active_positions = {}
+        self.orders = OrderManager(clock=self.clock)
+        self.execution = {pair: RealisticExecution(self.params[pair]) for pair in self.symbols.keys()}
+        self.instrument_by_symbol = build_symbol_index(self.symbols)
+        self.book = InstrumentBook(self.symbols, self.params)
+        self.locks = {pair: self.metrics.lock(pair) for pair in self.symbols.keys()}  # One shard per instrument
+        self.signal_queue = Queue()
+        self.dispatcher = TickDispatcher(self.metrics.stages)
+        self.dispatcher.subscribe("tick_store", self.on_tick)
+        self.dispatcher.subscribe("exits", self.on_exit_check)
+        if archive is not None:
+            self.dispatcher.subscribe("archive", archive.record)
+        self.strategy_mailbox = self.dispatcher.subscribe_mailbox("signal")
+        self.parse_latency = self.metrics.stage("parse")
+        self.bar_close_latency = self.metrics.stage("bar_close")
+        self.tick_counts = {pair: self.metrics.counter("ticks", (("instrument", pair),)) for pair in self.symbols.keys()}
+        self.metrics.gauge("ticks_coalesced", lambda: self.strategy_mailbox.coalesced)
+        self.strategy_h4_seen = {pair: 0 for pair in self.symbols.keys()}
+        self.bars = {pair: BarBuilder() for pair in self.symbols.keys()}
+        self.services_lock = Lock()
+        self.services_started = False
 
-    def aggregate_h4_candle(self, instrument, current_time):
-        with self.lock:
-            if self.current_ticks[instrument].empty:
-                print(f"[DEBUG] {instrument}: No ticks to build H4 candle")
-                return False
-            
-            current_ts = pd.Timestamp(current_time)
-            current_h4_start = current_ts.floor('4H')
-            
-            if self.last_processed_h4_start[instrument] is None:
-                self.last_processed_h4_start[instrument] = current_h4_start
-                return False
-            
-            if current_h4_start == self.last_processed_h4_start[instrument]:
-                return False
-            
-            previous_start = self.last_processed_h4_start[instrument]
-            previous_end = current_h4_start
-            
-            df = self.current_ticks[instrument].copy()
-            df['time'] = pd.to_datetime(df['time'], utc=True)
-            
-            mask = (df['time'] >= previous_start) & (df['time'] < previous_end)
-            interval_ticks = df[mask]
-            
-            if interval_ticks.empty:
-                print(f"[DEBUG] {instrument}: No ticks for H4 interval starting at {previous_start}")
-                return False
-            
-            candle = {
-                'time': previous_start,
-                'open': interval_ticks['bid'].iloc[0],
-                'high': interval_ticks['bid'].max(),
-                'low': interval_ticks['bid'].min(),
-                'close': interval_ticks['bid'].iloc[-1],
-                'bid': interval_ticks['bid'].iloc[-1],
-                'ask': interval_ticks['ask'].iloc[-1]
-            }
-            
+    def session_store(self, sender_comp_id, target_comp_id):
+        if self.state_dir is None:
+            return SessionStore()
+        return SessionStore(os.path.join(self.state_dir, f"{sender_comp_id}-{target_comp_id}.seq"))
+
+    def get_timestamp(self):
+        return fix_timestamp(self.clock)
+
+    def calculate_checksum(self, message):
+        return fix_checksum(message)
+
+    def create_fix_message(self, msg_type, fields, sender_comp_id, target_comp_id, sender_sub_id, seq_num):
+        return create_fix_message(msg_type, fields, sender_comp_id, target_comp_id, sender_sub_id, seq_num, self.clock)
+
+    async def subscribe_market_data(self, session):
+        for instrument, symbol_id in self.symbols.items():
+            md_req_id = f"MD_{instrument}_{int(time.time())}"
+            await session.send("V", f"262={md_req_id}|263=1|264=1|265=0|267=2|269=0|269=1|146=1|55={symbol_id}|")
+
+    def record_closed_bars(self, instrument, closed):
+        # Called with the instrument's lock held; returns True when a new H4 candle was added
+        new_h4 = False
+        for timeframe, bar in closed:
+            if self.archive is not None:
+                self.archive.record_bar(instrument, timeframe, bar)
+            if timeframe != "H4":
+                continue
+            candle = dict(bar, time=pd.Timestamp(bar['time'], tz='UTC'))
             print(f"[CANDLE] {instrument}: H4 candle - Open: {candle['open']:.3f}, High: {candle['high']:.3f}, "
                   f"Low: {candle['low']:.3f}, Close: {candle['close']:.3f}")
-            
             self.quotes[instrument].append(candle)
-            self.quotes[instrument] = sorted(self.quotes[instrument], key=lambda x: x['time'])[-3:]  # Keep last 3 candles
-            
-            self.current_ticks[instrument] = self.current_ticks[instrument][
-                self.current_ticks[instrument]['time'] >= previous_end
-            ]
-            self.last_processed_h4_start[instrument] = current_h4_start
-            return True
+            self.quotes[instrument] = self.quotes[instrument][-3:]  # Keep last 3 candles
+            self.current_ticks[instrument].discard_before(bar['time'] + H4_NS)
+            self.book.push_bar(self.book.slot[instrument], bar)
+            new_h4 = True
+        return new_h4
+
+    def warm_start(self):
+        # Rebuild bar history and self.quotes from the archive instead of waiting for new H4 closes
+        start = time.perf_counter()
+        now_ns = self.clock.now_ns()
+        for instrument in self.symbols.keys():
+            builder = self.bars[instrument]
+            for timeframe, period in zip(builder.timeframes, builder.periods):
+                history = self.archive.read_bars(instrument, timeframe, last=builder.history[timeframe].maxlen)
+                times, bids, asks = self.archive.load_range(instrument, now_ns - now_ns % period, now_ns)
+                forming = ticks_to_bars(times, bids, asks, period)
+                forming = {name: column[-1].item() for name, column in forming.items()} if len(times) else None
+                builder.seed(timeframe, history, forming)
+            with self.locks[instrument]:
+                self.quotes[instrument] = [dict(bar, time=pd.Timestamp(bar['time'], tz='UTC'))
+                                           for bar in builder.history["H4"].last(3)]
+                # The signal state needs the `lookback` bars before the latest one, as the backtester has
+                for bar in builder.history["H4"].last(self.params[instrument].get('lookback', 1) + 1):
+                    self.book.push_bar(self.book.slot[instrument], bar)
+            self.strategy_h4_seen[instrument] = builder.history["H4"].count
+            print(f"[INFO] {instrument}: Warm start loaded {len(self.quotes[instrument])} H4 candles")
+        print(f"[INFO] Warm start from {self.archive.root} took {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def aggregate_h4_candle(self, instrument, current_time):
+        # Timer-side close for bars whose boundary passed without a new tick
+        with self.locks[instrument]:
+            closed = self.bars[instrument].close_due(datetime_to_ns(current_time))
+            return self.record_closed_bars(instrument, closed)
+
+    def on_tick(self, instrument, time_ns, bid, ask):
+        with self.locks[instrument]:
+            self.current_ticks[instrument].append(time_ns, bid, ask)
+            self.book.update_quote(self.book.slot[instrument], time_ns, bid, ask)
+            closed = self.bars[instrument].update(time_ns, bid, ask)
+            if closed:
+                start = time.perf_counter_ns()
+                self.record_closed_bars(instrument, closed)
+                self.bar_close_latency.record(time.perf_counter_ns() - start)
+
+    def on_exit_check(self, instrument, time_ns, bid, ask):
+        exit_message = self.check_position_exits(instrument)
+        if exit_message:
+            self.signal_queue.put({'exit_message': exit_message})
 
     def is_trading_allowed(self):
-        now = datetime.datetime.now(datetime.UTC)
-        hour = now.hour
-        return not (21 <= hour < 23)
+        return trading_hours_allowed(self.clock.now().hour)
 
     def detect_signals(self, instrument):
-        with self.lock:
-            if len(self.quotes[instrument]) < 2:
-                print(f"[INFO] {instrument}: Need 2+ H4 candles (have {len(self.quotes[instrument])})")
-                return None
-            
-            if not self.is_trading_allowed():
-                print(f"[INFO] {instrument}: Trading restricted between 21:00-23:00 UTC")
-                return None
-                
-            if instrument in self.active_positions:
-                return None
-                
-            df = pd.DataFrame(self.quotes[instrument]).tail(2)
-            params = pairs_params[instrument]
-            
-            eq_high = abs(df['high'].iloc[-1] - df['high'].iloc[-2]) < params['tolerance'] * params['pip_value']
-            eq_low = abs(df['low'].iloc[-1] - df['low'].iloc[-2]) < params['tolerance'] * params['pip_value']
-            buy_signal = eq_low and df['close'].iloc[-1] > df['open'].iloc[-1]
-            sell_signal = eq_high and df['close'].iloc[-1] < df['open'].iloc[-1]
-            
-            latest_candle = df.iloc[-1]
-            if buy_signal:
-                signal = {
-                    'instrument': instrument,
-                    'signal': 'BUY',
-                    'entry_price': latest_candle['ask'],
-                    'time': latest_candle['time']
-                }
-                self.last_signal_times[instrument] = latest_candle['time']
-                print(f"[SIGNAL] {instrument}: BUY detected")
-                return signal
-            elif sell_signal:
-                signal = {
-                    'instrument': instrument,
-                    'signal': 'SELL',
-                    'entry_price': latest_candle['bid'],
-                    'time': latest_candle['time']
-                }
-                self.last_signal_times[instrument] = latest_candle['time']
-                print(f"[SIGNAL] {instrument}: SELL detected")
-                return signal
-            return None
+        signals = self.detect_all_signals([instrument])
+        return signals[0] if signals else None
+
+    def detect_all_signals(self, instruments=None):
+        # One vectorized pass over the given instruments (default: all)
+        book = self.book
+        slots = None if instruments is None else [book.slot[instrument] for instrument in instruments]
+        idx, buy, sell = book.signal_scan(slots)
+        for slot in idx[book.bar_count[idx] < 2]:
+            print(f"[INFO] {book.instruments[slot]}: Need 2+ H4 candles (have {book.bar_count[slot]})")
+        if not (buy | sell).any():
+            return []
+        if not self.is_trading_allowed():
+            print("[INFO] Trading restricted between 21:00-23:00 UTC")
+            return []
+        fire = (buy | sell) & (book.side[idx] == 0)
+        signals = []
+        for slot, is_buy in zip(idx[fire].tolist(), buy[fire].tolist()):
+            instrument = book.instruments[slot]
+            candle_time = pd.Timestamp(int(book.bar_time[slot]), tz='UTC')
+            side = 'BUY' if is_buy else 'SELL'
+            signals.append({
+                'instrument': instrument,
+                'signal': side,
+                'entry_price': float(book.bar_ask[slot] if is_buy else book.bar_bid[slot]),
+                'time': candle_time
+            })
+            self.last_signal_times[instrument] = candle_time
+            print(f"[SIGNAL] {instrument}: {side} detected")
+        return signals
 
     def check_position_exits(self, instrument):
-        with self.lock:
-            if instrument not in self.active_positions or self.current_ticks[instrument].empty:
+        # Scans every tick received since the previous check, so an exit between two checks is
+        # found at its own tick and reported at that tick's closing price (gaps included)
+        book = self.book
+        slot = book.slot[instrument]
+        with self.locks[instrument]:
+            if book.side[slot] == 0 or book.last_time[slot] == 0:
                 return None
-            latest_tick = self.current_ticks[instrument].iloc[-1]
             position = self.active_positions[instrument]
+            side = position['signal']
+            store = self.current_ticks[instrument]
+            checked, end = position['checked_index'], store.end_index
+            if end <= checked:
+                return None
+            position['checked_index'] = end
+            book.exits_checked(slot)
+            if end - checked == 1 and not store.empty:  # Per-tick path: only the newest tick is new
+                exit_time, bid, ask = store.latest()
+                sl_hit, tp_hit = exit_hits(side, bid, ask, position['sl'], position['tp'])
+                if not (sl_hit or tp_hit):
+                    return None
+                exit_price, reason = bid if side == 'BUY' else ask, 'SL' if sl_hit else 'TP'
+            else:
+                times, bids, asks = store.view_from(checked)
+                exit_index, reason = first_exit(side, bids, asks, position['sl'], position['tp'], 0, len(times))
+                if exit_index is None:
+                    return None
+                exit_time, exit_price = int(times[exit_index]), exit_fill(side, bids, asks, exit_index)
+            pips = (exit_price - position['entry_price']) * (1 if side == 'BUY' else -1) / self.params[instrument]['pip_value']
+            held = datetime.timedelta(seconds=(exit_time - position['opened_ns']) // 1_000_000_000)
             price_format = '.3f'
-            
-            if position['signal'] == 'BUY':
-                if latest_tick['bid'] <= position['sl']:
-                    pips = -pairs_params[instrument]['sl_pips']
-                    exit_message = f"*{instrument} Closed*\nBUY\nEntry: {position['entry_price']:{price_format}}\nExit: {position['sl']:{price_format}} (SL)\nPips: {pips:.1f}"
-                    del self.active_positions[instrument]
-                    return exit_message
-                elif latest_tick['ask'] >= position['tp']:
-                    pips = pairs_params[instrument]['tp_pips']
-                    exit_message = f"*{instrument} Closed*\nBUY\nEntry: {position['entry_price']:{price_format}}\nExit: {position['tp']:{price_format}} (TP)\nPips: {pips:.1f}"
-                    del self.active_positions[instrument]
-                    return exit_message
-            else:  # SELL
-                if latest_tick['ask'] >= position['sl']:
-                    pips = -pairs_params[instrument]['sl_pips']
-                    exit_message = f"*{instrument} Closed*\nSELL\nEntry: {position['entry_price']:{price_format}}\nExit: {position['sl']:{price_format}} (SL)\nPips: {pips:.1f}"
-                    del self.active_positions[instrument]
-                    return exit_message
-                elif latest_tick['bid'] <= position['tp']:
-                    pips = pairs_params[instrument]['tp_pips']
-                    exit_message = f"*{instrument} Closed*\nSELL\nEntry: {position['entry_price']:{price_format}}\nExit: {position['tp']:{price_format}} (TP)\nPips: {pips:.1f}"
-                    del self.active_positions[instrument]
-                    return exit_message
-            return None
+            exit_message = (f"*{instrument} Closed*\n{side}\nEntry: {position['entry_price']:{price_format}}\n"
+                            f"Exit: {exit_price:{price_format}} ({reason})\nPips: {pips:.1f}\nHeld: {held}")
+            del self.active_positions[instrument]
+            book.close_position(slot)
+            return exit_message
 
-    def send_order(self, signal):
+    def check_all_exits(self):
+        # Vectorized pass over every instrument's unchecked quote range; hits are resolved tick by
+        # tick under each instrument's lock
+        for slot in self.book.exit_scan().tolist():
+            exit_message = self.check_position_exits(self.book.instruments[slot])
+            if exit_message:
+                self.signal_queue.put({'exit_message': exit_message})
+
+    async def send_order(self, signal):
         instrument = signal['instrument']
-        params = pairs_params[instrument]
-        executor = RealisticExecution(params)
-        entry_price = executor.adjust_price(signal['entry_price'], signal['signal'])
-        symbol_id = symbol_id_map[instrument]
-        order_type = "1" if signal['signal'] == "BUY" else "2"
+        params = self.params[instrument]
+        entry_price = self.execution[instrument].adjust_price(signal['entry_price'], signal['signal'], self.clock.now().hour)
+        symbol_id = self.symbols[instrument]
+        order_type = b"1" if signal['signal'] == "BUY" else b"2"
         
-        sl_price = (entry_price - params['sl_pips'] * params['pip_value']) if order_type == "1" else (entry_price + params['sl_pips'] * params['pip_value'])
-        tp_price = (entry_price + params['tp_pips'] * params['pip_value']) if order_type == "1" else (entry_price - params['tp_pips'] * params['pip_value'])
+        sl_price, tp_price = bracket_prices(entry_price, signal['signal'], params)
+        order = self.orders.new_order(instrument, signal['signal'], ORDER_QUANTITY, sl_price, tp_price, signal['time'])
 
-        order_msg = self.create_fix_message(
-            "D",
-            f"11={int(time.time())}|55={symbol_id}|54={order_type}|38=0.01|40=1|99={sl_price:.3f}|44={tp_price:.3f}|59=1|167=FX|",
-            TRADE_SENDER_COMP_ID, TRADE_TARGET_COMP_ID, TRADE_SENDER_SUB_ID, self.trade_seq_num
-        )
-        self.send_message(self.trade_sock, order_msg, "Trading")
-        self.trade_seq_num += 1
-
-        with self.lock:
+        # The position opens at the expected price so exits are watched at once; fills reconcile it
+        with self.locks[instrument]:
             self.active_positions[instrument] = {
                 'signal': signal['signal'],
                 'entry_price': entry_price,
                 'sl': sl_price,
                 'tp': tp_price,
-                'time': signal['time']
+                'time': signal['time'],
+                'cl_ord_id': order.cl_ord_id,
+                'quantity': 0.0,
+                'opened_ns': int(self.book.last_time[self.book.slot[instrument]]),
+                'checked_index': self.current_ticks[instrument].end_index  # Ticks after the entry quote
             }
+            self.book.open_position(self.book.slot[instrument], signal['signal'], sl_price, tp_price)
+
+        try:
+            await self.trade_session.send(
+                b"D",
+                b"11=%s\x0155=%d\x0154=%s\x0138=%g\x0140=1\x0199=%.3f\x0144=%.3f\x0159=1\x01167=FX\x01"
+                % (order.cl_ord_id, symbol_id, order_type, ORDER_QUANTITY, sl_price, tp_price)
+            )
+        except Exception:
+            # The session dropped before the order went out: undo the order and its position
+            self.orders.discard(order)
+            with self.locks[instrument]:
+                position = self.active_positions.get(instrument)
+                if position is not None and position['cl_ord_id'] == order.cl_ord_id:
+                    del self.active_positions[instrument]
+                    self.book.close_position(self.book.slot[instrument])
+            raise
         message = f"*{instrument} Signal*\n{signal['signal']}\nEntry: {entry_price:.3f}\nSL: {sl_price:.3f}\nTP: {tp_price:.3f}"
         self.send_telegram_message(message)
 
+    async def cancel_order(self, order):
+        cancel_id = self.orders.cancel(order)
+        await self.trade_session.send(
+            b"F",
+            b"41=%s\x0111=%s\x0155=%d\x0154=%s\x0138=%g\x0160=%s\x01"
+            % (order.cl_ord_id, cancel_id, self.symbols[order.instrument], b"1" if order.side == "BUY" else b"2",
+               order.quantity, self.trade_session.encoder.timestamp())
+        )
+
+    def on_trade_message(self, raw, msg_type, recv_ns):
+        if msg_type == b"8":
+            result = self.orders.on_execution_report(raw)
+            if result is not None:
+                self.reconcile_position(*result)
+        elif msg_type == b"9":
+            order = self.orders.on_cancel_reject(raw)
+            if order is not None:
+                self.logger.info("orders", "[ORDER] %s cancel rejected: %s", order.cl_ord_id.decode(), order.text)
+
+    def reconcile_position(self, order, last_qty, last_px):
+        # Moves the position to the broker's average fill price, or drops it if nothing filled. SL/TP
+        # stay at the order's 99/44 prices, which is the bracket the broker actually holds.
+        instrument = order.instrument
+        self.logger.info("orders", "[ORDER] %s %s %s: %s filled %g @ %.5f", order.cl_ord_id.decode(), instrument,
+                         order.side, order.status, order.cum_qty, order.avg_px)
+        message = None
+        with self.locks[instrument]:
+            position = self.active_positions.get(instrument)
+            if position is None or position['cl_ord_id'] != order.cl_ord_id:
+                return  # Already closed locally
+            slot = self.book.slot[instrument]
+            if last_qty > 0:
+                position.update(entry_price=order.avg_px, quantity=order.cum_qty)
+                if order.status == "FILLED":
+                    message = (f"*{instrument} Filled*\n{order.side} {order.cum_qty:g} @ {order.avg_px:.3f}\n"
+                               f"SL: {order.sl:.3f}\nTP: {order.tp:.3f}")
+            elif order.status in TERMINAL_STATUS and order.cum_qty == 0:
+                del self.active_positions[instrument]
+                self.book.close_position(slot)
+                message = f"*{instrument} Order {order.status.title()}*\n{order.side}\n{order.text or ''}"
+        if message:
+            self.send_telegram_message(message)
+
     def send_telegram_message(self, message):
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        payload = {"chat_id": TELEGRAM_CHAT_ID, "text": message, "parse_mode": "Markdown"}
+        # Queued for the notifier thread; never blocks the caller
+        self.notifier.notify(message)
+
+    def on_quote_message(self, raw, msg_type, recv_ns):
+        if msg_type != b"W":
+            return
+        snapshot = parse_market_data(raw)
+        instrument = snapshot and self.instrument_by_symbol.get(snapshot.symbol_id)
+        if not instrument:
+            return
+        self.parse_latency.record(time.perf_counter_ns() - recv_ns)
+        self.tick_counts[instrument].value += 1
+        bid, ask = snapshot.bid, snapshot.ask
+        sending_time = snapshot.sending_time or self.get_timestamp().encode()
+        self.dispatcher.publish(instrument, parse_fix_timestamp_ns(sending_time), bid or 0, ask or bid or 0, recv_ns)
+
+    async def run_bar_timer(self):
+        # Close bars at their boundary even if no tick arrives; every timeframe is a multiple of M1
+        minute = TIMEFRAME_NS["M1"]
+        while True:
+            await asyncio.sleep((minute - self.clock.now_ns() % minute) / 1e9)
+            current_time = self.clock.now()
+            for instrument in self.symbols.keys():
+                if self.aggregate_h4_candle(instrument, current_time):
+                    self.strategy_mailbox.put(instrument, None)
+            self.check_all_exits()
+
+    async def run_latency_report(self):
+        while True:
+            await asyncio.sleep(60)
+            self.metrics.report()
+
+    def next_signal(self, timeout=1):
         try:
-            requests.post(url, json=payload)
-        except Exception as e:
-            print(f"[ERROR] Telegram send error: {e}")
+            return self.signal_queue.get(timeout=timeout)
+        except Empty:
+            return None
 
-    def run_quotes(self):
+    async def run_orders(self):
+        # Drains signal_queue (filled by the strategy thread and the inline exit checks)
         while True:
-            if not self.connect_quote_session():
-                time.sleep(5)
+            item = await asyncio.to_thread(self.next_signal)
+            if item is None:
                 continue
-            
-            last_process_time = time.time()
-            while True:
-                try:
-                    now = time.time()
-                    current_time = datetime.datetime.now(datetime.UTC)
-                    if now - self.quote_last_heartbeat > HEARTBEAT_INTERVAL:
-                        self.quote_seq_num = self.send_heartbeat(self.quote_sock, "Quotes", self.quote_seq_num)
-                        self.quote_last_heartbeat = now
-
-                    if now - last_process_time >= 60:  # Check every minute
-                        for instrument in symbol_id_map.keys():
-                            if self.aggregate_h4_candle(instrument, current_time):
-                                signal = self.detect_signals(instrument)
-                                if signal:
-                                    self.signal_queue.put(signal)
-                            exit_message = self.check_position_exits(instrument)
-                            if exit_message:
-                                self.signal_queue.put({'exit_message': exit_message})
-                        last_process_time = now
-
-                    msg = self.receive_message(self.quote_sock, "Quotes")
-                    if "35=W" in msg:
-                        fields = dict(f.split("=") for f in msg.split("|") if "=" in f)
-                        symbol_id = int(fields.get('55', fields.get('146', 0)))
-                        instrument = next((k for k, v in symbol_id_map.items() if v == symbol_id), None)
-                        if not instrument:
-                            continue
-                        bid = ask = None
-                        for i, field in enumerate(msg.split("|")):
-                            if field == "269=0":
-                                bid = float(msg.split("|")[i + 1].split("=")[1])
-                            elif field == "269=1":
-                                ask = float(msg.split("|")[i + 1].split("=")[1])
-                        tick_time = pd.to_datetime(fields.get('52', self.get_timestamp()), utc=True)
-                        tick = {'time': tick_time, 'bid': bid or 0, 'ask': ask or bid or 0}
-                        with self.lock:
-                            self.current_ticks[instrument] = pd.concat(
-                                [self.current_ticks[instrument], pd.DataFrame([tick])], 
-                                ignore_index=True
-                            )
-                    elif "35=5" in msg or not msg:
-                        break
-                except Exception as e:
-                    print(f"[ERROR] Quotes processing failed: {e}")
-                    break
-            self.quote_sock.close()
-            time.sleep(5)
+            try:
+                if 'exit_message' in item:
+                    self.send_telegram_message(item['exit_message'])
+                else:
+                    await self.trade_session.logged_on.wait()
+                    await self.send_order(item)
+            except Exception as e:
+                print(f"[ERROR] Trading failed: {e}")
+            finally:
+                self.signal_queue.task_done()
+
+    async def run_async(self):
+        # One event loop drives both sessions, the order path and the timers
+        await asyncio.gather(self.quote_session.run(), self.run_bar_timer(), self.run_latency_report(),
+                             self.trade_session.run(), self.run_orders())
+
+    def run_quotes(self):
+        self._start_services()
+        asyncio.run(self._gather(self.quote_session.run(), self.run_bar_timer(), self.run_latency_report()))
+
+    def run_trading(self):
+        self._start_services()
+        asyncio.run(self._gather(self.trade_session.run(), self.run_orders()))
+
+    def _start_services(self):
+        # Notifier, metrics endpoint, archive and warm start, once per trader whichever entry point runs first
+        with self.services_lock:
+            if self.services_started:
+                return
+            self.services_started = True
+            preload_modules()
+            self.notifier.start()
+            if METRICS_PORT:
+                self.metrics.serve(METRICS_PORT)
+            if self.archive is not None:
+                self.archive.start()
+                self.warm_start()
+
+    @staticmethod
+    async def _gather(*coroutines):
+        await asyncio.gather(*coroutines)
 
     def run_signals(self):
+        # Strategy consumer: woken by ticks (coalesced per instrument) and timer bar closes;
+        # exits are already checked inline on every tick by the dispatcher
+        latency = self.dispatcher.latency["signal"]
         while True:
             try:
-                for instrument in symbol_id_map.keys():
-                    exit_message = self.check_position_exits(instrument)
-                    if exit_message:
-                        self.signal_queue.put({'exit_message': exit_message})
-                time.sleep(1)
+                changed = []
+                ticks = self.strategy_mailbox.drain(timeout=1)
+                for instrument, tick in ticks.items():
+                    h4_count = self.bars[instrument].history["H4"].count
+                    if h4_count != self.strategy_h4_seen[instrument]:
+                        self.strategy_h4_seen[instrument] = h4_count
+                        changed.append(instrument)
+                if changed:
+                    for signal in self.detect_all_signals(changed):
+                        self.signal_queue.put(signal)
+                now_ns = time.perf_counter_ns()  # Tick-to-decision includes the scan
+                for tick in ticks.values():
+                    if tick is not None:
+                        latency.record(now_ns - tick[3])
             except Exception as e:
                 print(f"[ERROR] Signal detection failed: {e}")
                 time.sleep(1)
 
-    def run_trading(self):
-        while True:
-            if not self.connect_trade_session():
-                time.sleep(5)
-                continue
-            
-            last_heartbeat_check = time.time()
-            while True:
-                try:
-                    now = time.time()
-                    if now - last_heartbeat_check >= 5:
-                        if now - self.trade_last_heartbeat > HEARTBEAT_INTERVAL:
-                            self.trade_seq_num = self.send_heartbeat(self.trade_sock, "Trading", self.trade_seq_num)
-                            self.trade_last_heartbeat = now
-                        last_heartbeat_check = now
-
-                    while not self.signal_queue.empty():
-                        item = self.signal_queue.get()
-                        if 'exit_message' in item:
-                            self.send_telegram_message(item['exit_message'])
-                        else:
-                            self.send_order(item)
-                        self.signal_queue.task_done()
-
-                    msg = self.receive_message(self.trade_sock, "Trading")
-                    if "35=5" in msg or not msg:
-                        break
-                except Exception as e:
-                    print(f"[ERROR] Trading failed: {e}")
-                    break
-            self.trade_sock.close()
-            time.sleep(5)
-
     def run(self):
-        quote_thread = Thread(target=self.run_quotes)
+        self._start_services()
+        # The event loop gets its own thread so this also works where one is already running (Colab)
+        loop_thread = Thread(target=asyncio.run, args=(self.run_async(),))
         signal_thread = Thread(target=self.run_signals)
-        trade_thread = Thread(target=self.run_trading)
-        quote_thread.daemon = True
+        loop_thread.daemon = True
         signal_thread.daemon = True
-        trade_thread.daemon = True
-        quote_thread.start()
+        loop_thread.start()
         signal_thread.start()
-        trade_thread.start()
         try:
             while True:
                 time.sleep(1)
         except KeyboardInterrupt:
             print("[INFO] Shutting down...")
-            if self.quote_sock:
-                self.quote_sock.close()
-            if self.trade_sock:
-                self.trade_sock.close()
+            if self.archive is not None:
+                self.archive.close()
+            self.notifier.close()
+            self.metrics.close()
+            self.logger.close()
+            self.quote_session.store.close()
+            self.trade_session.store.close()
 
-if __name__ == "__main__":
+# Backtesting
+HOUR_NS = 3600 * 1_000_000_000
+
+def ticks_to_bars(times, bids, asks, period_ns):
+    # Vectorized OHLC over bid for sorted ticks; same bar fields as BarBuilder
+    if len(times) == 0:
+        return {name: np.empty(0, dtype=np.int64 if name in ('time', 'ticks') else np.float64) for name in BAR_FIELDS}
+    index = times // period_ns
+    starts = np.flatnonzero(np.concatenate(([True], index[1:] != index[:-1])))
+    ends = np.concatenate((starts[1:], [len(times)]))
+    return {
+        'time': index[starts] * period_ns,
+        'open': bids[starts],
+        'high': np.maximum.reduceat(bids, starts),
+        'low': np.minimum.reduceat(bids, starts),
+        'close': bids[ends - 1],
+        'bid': bids[ends - 1],
+        'ask': asks[ends - 1],
+        'ticks': ends - starts,
+        'volume': np.zeros(len(starts))
+    }
+
+def iter_tick_chunks(paths, chunk_size=5_000_000):
+    # Streams (time_ns, bid, ask) arrays from .npz/.npy (fields time/bid/ask) or .csv files
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        if path.endswith('.csv'):
+            for frame in pd.read_csv(path, chunksize=chunk_size):
+                times = pd.to_datetime(frame['time'], utc=True).to_numpy(dtype='datetime64[ns]').view(np.int64)
+                yield times, frame['bid'].to_numpy(np.float64), frame['ask'].to_numpy(np.float64)
+            continue
+        if path.endswith('.npz'):
+            yield from _iter_npz_chunks(path, chunk_size)
+            continue
+        data = np.load(path, mmap_mode='r')
+        times, bids, asks = data['time'], data['bid'], data['ask']
+        for i in range(0, len(times), chunk_size):
+            yield (np.asarray(times[i:i + chunk_size], dtype=np.int64), np.asarray(bids[i:i + chunk_size], dtype=np.float64),
+                   np.asarray(asks[i:i + chunk_size], dtype=np.float64))
+
+def _iter_npz_chunks(path, chunk_size):
+    # np.load would read whole members, so the time/bid/ask .npy members are streamed straight
+    # from the zip (stored or deflated) one chunk at a time
+    with zipfile.ZipFile(path) as archive:
+        columns = []
+        for name, dtype in (('time', np.int64), ('bid', np.float64), ('ask', np.float64)):
+            stream = archive.open(name + '.npy')
+            version = np.lib.format.read_magic(stream)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            shape, _, stored = read_header(stream)
+            columns.append((stream, stored, dtype, shape[0]))
+        try:
+            n = columns[0][3]
+            for i in range(0, n, chunk_size):
+                count = min(chunk_size, n - i)
+                yield tuple(np.frombuffer(stream.read(count * stored.itemsize), dtype=stored).astype(dtype, copy=False)
+                            for stream, stored, dtype, _ in columns)
+        finally:
+            for stream, *_ in columns:
+                stream.close()
+
+class Backtester:
+    # Runs the live strategy (equal highs/lows on closed bars, SL/TP exits on every tick, one
+    # position per instrument, no entries 21:00-23:00 UTC) over recorded ticks. Bars, signal
+    # candidates and exit searches are vectorized per chunk; only the few signal candidates
+    # are walked in order, since one open position blocks new entries.
+    def __init__(self, instrument="GBP_JPY", params=None, period_ns=H4_NS, seed=None):
+        self.instrument = instrument
+        self.params = params or pairs_params[instrument]
+        self.period_ns = period_ns
+        self.execution = RealisticExecution(self.params, rng=np.random.default_rng(seed))
+        self.rule = signal_rule(self.params)[0]
+        self.clock = ReplayClock()
+        self.reset()
+
+    def reset(self):
+        self.ledger = []
+        self.position = None
+        self.partial_bar = None   # Last, still-forming bar of the previous chunk
+        self.previous_bars = None  # Last `lookback` completed bars, history for the next chunk's signals
+        self.ticks_processed = 0
+        self.bars_closed = 0
+
+    def _split_bars(self, bars):
+        # Merge the carried partial bar into this chunk and hold back the new last bar
+        partial = self.partial_bar
+        if partial is not None:
+            if bars['time'][0] == partial['time']:
+                bars['open'][0] = partial['open']
+                bars['high'][0] = max(bars['high'][0], partial['high'])
+                bars['low'][0] = min(bars['low'][0], partial['low'])
+                bars['ticks'][0] += partial['ticks']
+            else:
+                bars = {name: np.concatenate(([partial[name]], column)) for name, column in bars.items()}
+        self.partial_bar = {name: column[-1].item() for name, column in bars.items()}
+        return {name: column[:-1] for name, column in bars.items()}
+
+    def _signal_candidates(self, bars):
+        lookback = self.params.get('lookback', 1)
+        carried = 0
+        if self.previous_bars is not None:
+            carried = len(self.previous_bars['time'])
+            bars = {name: np.concatenate((self.previous_bars[name], column)) for name, column in bars.items()}
+        if len(bars['time']):
+            self.previous_bars = {name: column[-lookback:].copy() for name, column in bars.items()}
+        tolerance = self.params['tolerance'] * self.params['pip_value']
+        buy, sell = self.rule(bars, tolerance, lookback)
+        decision_ns = bars['time'] + self.period_ns
+        allowed = trading_hours_allowed((decision_ns // HOUR_NS) % 24)
+        candidates = []
+        for k in np.flatnonzero((buy | sell) & allowed):
+            if k < carried:
+                continue  # Decided with the previous chunk
+            side = 'BUY' if buy[k] else 'SELL'
+            price = bars['ask'][k] if side == 'BUY' else bars['bid'][k]
+            candidates.append((int(decision_ns[k]), side, float(price), int(bars['time'][k])))
+        return candidates
+
+    def _open(self, decision_ns, side, price, bar_time):
+        self.clock.set(decision_ns)
+        entry_price = self.execution.adjust_price(price, side, decision_ns // HOUR_NS % 24)
+        sl, tp = bracket_prices(entry_price, side, self.params)
+        self.position = {'signal': side, 'signal_price': price, 'entry_price': entry_price, 'sl': sl, 'tp': tp,
+                         'time': bar_time, 'entry_time': decision_ns}
+
+    def _resolve(self, times, bids, asks, lo, hi):
+        if hi <= lo or self.position is None:
+            return
+        position = self.position
+        exit_index, reason = first_exit(position['signal'], bids, asks, position['sl'], position['tp'], lo, hi)
+        if exit_index is None:
+            return
+        exit_price = exit_fill(position['signal'], bids, asks, exit_index)
+        exit_time = int(times[exit_index])
+        direction = 1 if position['signal'] == 'BUY' else -1
+        self.ledger.append({
+            'instrument': self.instrument,
+            'signal': position['signal'],
+            'bar_time': position['time'],
+            'entry_time': position['entry_time'],
+            'signal_price': position['signal_price'],
+            'entry_price': position['entry_price'],
+            'sl': position['sl'],
+            'tp': position['tp'],
+            'exit_time': exit_time,
+            'exit_price': exit_price,
+            'exit_reason': reason,
+            'time_in_trade': exit_time - position['entry_time'],
+            'pips': direction * (exit_price - position['entry_price']) / self.params['pip_value']
+        })
+        self.position = None
+
+    def process_chunk(self, times, bids, asks):
+        n = len(times)
+        if n == 0:
+            return
+        self.ticks_processed += n
+        bars = self._split_bars(ticks_to_bars(times, bids, asks, self.period_ns))
+        self.bars_closed += len(bars['time'])
+        cursor = 0
+        for decision_ns, side, price, bar_time in self._signal_candidates(bars):
+            stop = int(np.searchsorted(times, decision_ns, side='left'))
+            self._resolve(times, bids, asks, cursor, stop)
+            cursor = max(cursor, stop)
+            if self.position is None:
+                self._open(decision_ns, side, price, bar_time)
+        self._resolve(times, bids, asks, cursor, n)
+        self.clock.set(int(times[-1]))
+
+    def run(self, chunks):
+        for times, bids, asks in chunks:
+            self.process_chunk(times, bids, asks)
+        return self.results()
+
+    def results(self):
+        columns = ['instrument', 'signal', 'bar_time', 'entry_time', 'signal_price', 'entry_price', 'sl', 'tp',
+                   'exit_time', 'exit_price', 'exit_reason', 'time_in_trade', 'pips']
+        ledger = pd.DataFrame(self.ledger, columns=columns)
+        for column in ('bar_time', 'entry_time', 'exit_time'):
+            ledger[column] = pd.to_datetime(ledger[column].astype('int64'), utc=True)
+        ledger['time_in_trade'] = pd.to_timedelta(ledger['time_in_trade'].astype('int64'))
+        return ledger, summarize_ledger(ledger, self.params)
+
+def first_exit(side, bids, asks, sl, tp, lo, hi, window=4096):
+    # Index of the first tick in [lo, hi) touching SL or TP, scanning in doubling windows so a
+    # trade that closes quickly does not pay for the rest of the history
+    while lo < hi:
+        stop = min(hi, lo + window)
+        sl_hit, tp_hit = exit_hits(side, bids[lo:stop], asks[lo:stop], sl, tp)
+        hit = sl_hit | tp_hit
+        j = int(np.argmax(hit))
+        if hit[j]:
+            return lo + j, 'SL' if sl_hit[j] else 'TP'
+        lo = stop
+        window *= 2
+    return None, None
+
+def exit_fill(side, bids, asks, index):
+    # Price the position actually closes at: the closing quote of the exit tick, so a market that
+    # gaps through SL or TP fills at the gapped price rather than the level
+    return float(bids[index] if side == 'BUY' else asks[index])
+
+def _first_hits(gather, lo, hi, sl, tp, window, max_cells):
+    # Per row, the first column in [lo, hi) whose gathered (low, high) reaches sl or tp, or -1.
+    # Unresolved rows advance together through doubling windows gathered as one (rows x window)
+    # block of at most max_cells values; columns past hi repeat the last one in range.
+    index = np.full(len(lo), -1, dtype=np.int64)
+    lo = lo.copy()
+    pending = np.flatnonzero(lo < hi)
+    while len(pending):
+        width = max(1, min(window, max_cells // len(pending)))
+        start = lo[pending]
+        cols = np.minimum(start[:, None] + np.arange(width), hi[pending, None] - 1)
+        low, high = gather(pending, cols)
+        hit = (low <= sl[pending, None]) | (high >= tp[pending, None])
+        first = hit.argmax(axis=1)
+        rows = np.arange(len(pending))
+        found = hit[rows, first]
+        index[pending[found]] = cols[rows[found], first[found]]
+        lo[pending] = start + width
+        pending = pending[~found & (lo[pending] < hi[pending])]
+        window *= 2
+    return index
+
+def first_exits(side, bids, asks, sl, tp, lo, hi, block=256, max_cells=1 << 21):
+    # Batched first_exit: for every position, the index of the first tick in [lo, hi) touching SL
+    # or TP, or -1. Prices are compared signed (bid for BUY, -ask for SELL against signed levels)
+    # so one rule covers both sides. Ticks are grouped into blocks with precomputed min/max: the
+    # search runs over block extremes and only the first partial block and the block that
+    # crosses a level are scanned tick by tick.
+    direction = trade_directions(side)
+    n = len(direction)
+    buy = direction > 0
+    sl = np.broadcast_to(np.asarray(sl, dtype=np.float64), n) * direction
+    tp = np.broadcast_to(np.asarray(tp, dtype=np.float64), n) * direction
+    lo = np.broadcast_to(np.asarray(lo, dtype=np.int64), n)
+    hi = np.broadcast_to(np.asarray(hi, dtype=np.int64), n)
+
+    def ticks(rows, cols):
+        quotes = np.empty(cols.shape)
+        rows_buy = buy[rows]
+        quotes[rows_buy] = bids[cols[rows_buy]]
+        quotes[~rows_buy] = -asks[cols[~rows_buy]]
+        return quotes, quotes
+
+    def scan(lo, hi):
+        return _first_hits(ticks, lo, hi, sl, tp, block, max_cells)
+
+    index = scan(lo, np.minimum(hi, (lo // block + 1) * block))
+    pending = np.flatnonzero((index < 0) & ((lo // block + 1) * block < hi))
+    if len(pending):
+        starts = np.arange(0, len(bids), block)
+        extremes = (np.minimum.reduceat(bids, starts), np.maximum.reduceat(bids, starts),
+                    -np.maximum.reduceat(asks, starts), -np.minimum.reduceat(asks, starts))
+
+        def blocks(rows, cols):
+            rows_buy = buy[pending[rows]]
+            low, high = np.empty(cols.shape), np.empty(cols.shape)
+            low[rows_buy], high[rows_buy] = extremes[0][cols[rows_buy]], extremes[1][cols[rows_buy]]
+            low[~rows_buy], high[~rows_buy] = extremes[2][cols[~rows_buy]], extremes[3][cols[~rows_buy]]
+            return low, high
+
+        first_block = _first_hits(blocks, lo[pending] // block + 1, (hi[pending] + block - 1) // block,
+                                  sl[pending], tp[pending], 16, max_cells)
+        crossing = pending[first_block >= 0]
+        block_start = first_block[first_block >= 0] * block
+        inner = np.full(n, 0, dtype=np.int64)
+        inner_hi = np.zeros(n, dtype=np.int64)
+        inner[crossing] = block_start
+        inner_hi[crossing] = np.minimum(hi[crossing], block_start + block)
+        found = scan(inner, inner_hi)
+        index[crossing] = found[crossing]
+    return index
+
+def resolve_exits(times, bids, asks, side, entry_ns, entry_price, sl, tp, pip_value, end_ns=None):
+    # Exit fills for a batch of positions over one sorted tick history. Each position is watched
+    # from the first tick at or after its entry_ns and closes at that exit tick's closing quote
+    # (see exit_fill). Positions still open at end_ns get exit_index -1 and NaN prices.
+    direction = trade_directions(side)
+    n = len(direction)
+    entry_ns = np.broadcast_to(np.asarray(entry_ns, dtype=np.int64), n)
+    sl = np.broadcast_to(np.asarray(sl, dtype=np.float64), n)
+    tp = np.broadcast_to(np.asarray(tp, dtype=np.float64), n)
+    lo = np.searchsorted(times, entry_ns, side='left')
+    hi = len(times) if end_ns is None else int(np.searchsorted(times, end_ns, side='left'))
+    index = first_exits(direction, bids, asks, sl, tp, lo, hi)
+    done = index >= 0
+    at = index[done]
+    exit_price = np.full(n, np.nan)
+    exit_price[done] = np.where(direction[done] > 0, bids[at], asks[at])
+    exit_time = np.full(n, -1, dtype=np.int64)
+    exit_time[done] = times[at]
+    is_sl = direction * exit_price <= direction * sl
+    level = np.where(is_sl, sl, tp)
+    return {
+        'exit_index': index,
+        'exit_time': exit_time,
+        'exit_price': exit_price,
+        'exit_reason': np.where(done, np.where(is_sl, 'SL', 'TP'), ''),
+        'time_in_trade_ns': np.where(done, exit_time - entry_ns, -1),
+        'pips': direction * (exit_price - entry_price) / pip_value,
+        'gap_pips': direction * (exit_price - level) / pip_value  # Negative when gapped past the level
+    }
+
+def summarize_ledger(ledger, params):
+    return pip_statistics(ledger['pips'].to_numpy(dtype=np.float64), params)
+
+def pip_statistics(pips, params):
+    wins = pips[pips > 0]
+    losses = pips[pips <= 0]
+    equity = np.cumsum(pips)
+    drawdown = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:] - equity if len(pips) else np.zeros(0)
+    return {
+        'trades': len(pips),
+        'wins': len(wins),
+        'losses': len(losses),
+        'win_rate': len(wins) / len(pips) if len(pips) else 0.0,
+        'total_pips': float(pips.sum()),
+        'avg_pips': float(pips.mean()) if len(pips) else 0.0,
+        'profit_factor': float(wins.sum() / -losses.sum()) if losses.sum() < 0 else float('inf') if len(wins) else 0.0,
+        'max_drawdown_pips': float(drawdown.max()) if len(drawdown) else 0.0,
+        'total_pnl': float(pips.sum() * params['pip_value'])  # Price units per unit traded
+    }
+
+def monte_carlo_ledger(ledger, params, paths=1000, seed=None, max_cells=1 << 24):
+    # Re-prices every trade's entry with fresh execution costs on each path, keeping the exits of
+    # the backtest, and returns per-path statistics. Paths run as (paths x trades) blocks.
+    direction = trade_directions(ledger['signal'].to_numpy())
+    gross = direction * (ledger['exit_price'].to_numpy() - ledger['signal_price'].to_numpy()) / params['pip_value']
+    hour = ledger['entry_time'].dt.hour.to_numpy()
+    execution = RealisticExecution(params, rng=np.random.default_rng(seed))
+    block = max(1, max_cells // max(1, len(gross)))
+    results = []
+    for start in range(0, paths, block):
+        rows = min(block, paths - start)
+        cost = execution.sample(rows * len(gross), np.tile(hour, rows))['cost'].reshape(rows, len(gross))
+        pips = gross - cost / params['pip_value']
+        equity = np.cumsum(pips, axis=1)
+        peak = np.maximum.accumulate(np.concatenate((np.zeros((rows, 1)), equity), axis=1), axis=1)[:, 1:]
+        results.append(pd.DataFrame({
+            'total_pips': pips.sum(axis=1),
+            'win_rate': (pips > 0).mean(axis=1) if len(gross) else np.zeros(rows),
+            'max_drawdown_pips': (peak - equity).max(axis=1, initial=0.0),
+            'worst_trade_pips': pips.min(axis=1) if len(gross) else np.zeros(rows),
+            'cost_pips': cost.sum(axis=1) / params['pip_value']
+        }))
+    return pd.concat(results, ignore_index=True)
+
+# Parameter optimization
+_sweep_data = None
+
+def _load_sweep_data(directory):
+    # Worker initializer: every process maps the same precomputed arrays read-only from disk
+    global _sweep_data
+    _sweep_data = {name[:-4]: np.load(os.path.join(directory, name), mmap_mode='r')
+                   for name in os.listdir(directory) if name.endswith('.npy')}
+
+def _evaluate_task(task):
+    combo_id, tolerance, sl_pips, tp_pips, segment, start_ns, end_ns, params, seed = task
+    data = _sweep_data
+    params = dict(params, tolerance=tolerance, sl_pips=sl_pips, tp_pips=tp_pips)
+    buy, sell = signal_rule(params)[0](data, tolerance * params['pip_value'], params.get('lookback', 1))
+    buy, sell = buy[1:], sell[1:]  # Aligned with decision_ns, which starts at the second bar
+    decision_ns = data['decision_ns']
+    mask = (buy | sell) & data['allowed'] & (decision_ns >= start_ns) & (decision_ns < end_ns)
+    bids, asks = data['bid'], data['ask']
+    end_index = int(np.searchsorted(data['time'], end_ns, side='left'))
+    execution = RealisticExecution(params, rng=np.random.default_rng(seed))
+    pips = []
+    free_from = 0
+    for k in np.flatnonzero(mask):
+        index = int(data['decision_index'][k])
+        if index < free_from:
+            continue  # Previous position still open at this bar close
+        side = 'BUY' if buy[k] else 'SELL'
+        entry_price = execution.adjust_price(float(data['bar_ask'][k + 1] if side == 'BUY' else data['close'][k + 1]), side,
+                                             int(decision_ns[k]) // HOUR_NS % 24)
+        sl, tp = bracket_prices(entry_price, side, params)
+        exit_index, reason = first_exit(side, bids, asks, sl, tp, index, end_index)
+        if exit_index is None:
+            break  # Still open at the end of the segment
+        exit_price = exit_fill(side, bids, asks, exit_index)
+        pips.append((exit_price - entry_price if side == 'BUY' else entry_price - exit_price) / params['pip_value'])
+        free_from = exit_index + 1
+    stats = pip_statistics(np.array(pips, dtype=np.float64), params)
+    return dict(combo=combo_id, tolerance=tolerance, sl_pips=sl_pips, tp_pips=tp_pips, segment=segment, **stats)
+
+class ParameterSweep:
+    # Grid/random search over (tolerance, sl_pips, tp_pips) on a process pool. Bars, signal
+    # inputs and ticks are computed once and written as .npy files that every worker memory-maps,
+    # so tasks only carry a parameter tuple. History is cut into equal time segments for
+    # walk-forward validation.
+    def __init__(self, times, bids, asks, instrument="GBP_JPY", params=None, period_ns=H4_NS, segments=4, seed=1):
+        self.params = dict(params or pairs_params[instrument])
+        self.seed = seed
+        self.directory = tempfile.mkdtemp(prefix="fix_sweep_")
+        times = np.ascontiguousarray(times, dtype=np.int64)
+        bars = ticks_to_bars(times, bids, asks, period_ns)
+        decision_ns = bars['time'][1:] + period_ns
+        arrays = {
+            'time': times,
+            'bid': np.ascontiguousarray(bids, dtype=np.float64),
+            'ask': np.ascontiguousarray(asks, dtype=np.float64),
+            'open': bars['open'],
+            'high': bars['high'],
+            'low': bars['low'],
+            'close': bars['close'],
+            'bar_ask': bars['ask'],
+            'decision_ns': decision_ns,
+            'decision_index': np.searchsorted(times, decision_ns, side='left'),
+            'allowed': trading_hours_allowed((decision_ns // HOUR_NS) % 24)
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(self.directory, f"{name}.npy"), array)
+        self.bounds = np.linspace(int(times[0]), int(times[-1]) + 1, segments + 1).astype(np.int64)
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    @staticmethod
+    def grid(tolerance, sl_pips, tp_pips):
+        return list(itertools.product(tolerance, sl_pips, tp_pips))
+
+    @staticmethod
+    def random(n, tolerance=(5.0, 60.0), sl_pips=(10.0, 150.0), tp_pips=(20.0, 400.0), seed=0):
+        rng = np.random.default_rng(seed)
+        columns = [np.round(rng.uniform(lo, hi, n), 2) for lo, hi in (tolerance, sl_pips, tp_pips)]
+        return list(zip(*(column.tolist() for column in columns)))
+
+    def tasks(self, combos):
+        for combo_id, (tolerance, sl_pips, tp_pips) in enumerate(combos):
+            for segment in range(len(self.bounds) - 1):
+                yield (combo_id, tolerance, sl_pips, tp_pips, segment,
+                       int(self.bounds[segment]), int(self.bounds[segment + 1]), self.params, self.seed)
+
+    def run(self, combos, processes=None, chunksize=16):
+        # One row per (combo, segment); sort it however you like
+        if processes == 1:
+            _load_sweep_data(self.directory)
+            rows = [_evaluate_task(task) for task in self.tasks(combos)]
+        else:
+            with multiprocessing.Pool(processes, initializer=_load_sweep_data, initargs=(self.directory,)) as pool:
+                rows = list(pool.imap_unordered(_evaluate_task, self.tasks(combos), chunksize=chunksize))
+        return pd.DataFrame(rows).sort_values(['combo', 'segment'], ignore_index=True)
+
+    @staticmethod
+    def rank(table, metric='total_pips'):
+        summary = table.groupby(['combo', 'tolerance', 'sl_pips', 'tp_pips'], as_index=False).agg(
+            trades=('trades', 'sum'), total_pips=('total_pips', 'sum'),
+            worst_segment_pips=('total_pips', 'min'), max_drawdown_pips=('max_drawdown_pips', 'max'))
+        return summary.sort_values(metric, ascending=False, ignore_index=True)
+
+    @staticmethod
+    def walk_forward(table, metric='total_pips'):
+        # Pick the best combo on segment i and report how it did on the unseen segment i + 1
+        steps = []
+        segments = sorted(table['segment'].unique())
+        for train, test in zip(segments[:-1], segments[1:]):
+            best = table[table['segment'] == train].sort_values(metric, ascending=False).iloc[0]
+            out = table[(table['segment'] == test) & (table['combo'] == best['combo'])].iloc[0]
+            steps.append({'train_segment': train, 'test_segment': test, 'tolerance': best['tolerance'],
+                          'sl_pips': best['sl_pips'], 'tp_pips': best['tp_pips'],
+                          f'train_{metric}': best[metric], f'test_{metric}': out[metric], 'test_trades': out['trades']})
+        return pd.DataFrame(steps)
+
+def synthetic_ticks(n_ticks, start_ns=1_600_000_000 * 1_000_000_000, mean_gap_ms=250, start_price=190.0, seed=11):
+    rng = np.random.default_rng(seed)
+    times = start_ns + np.cumsum(rng.exponential(mean_gap_ms * 1_000_000, n_ticks)).astype(np.int64)
+    bids = start_price + np.cumsum(rng.normal(0, 0.004, n_ticks))
+    return times, bids, bids + 0.02
+
+# Simulation
+class _AcceptorConnection:
+    # The lock is held from encoding a message until its last piece is written, so concurrent
+    # senders (stream, heartbeats, replies) neither interleave pieces nor reorder MsgSeqNums
+    __slots__ = ('writer', 'lock', 'encoder', 'seq_num', 'tasks', 'key')
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.lock = asyncio.Lock()
+        self.encoder = None
+        self.seq_num = 1
+        self.tasks = []
+        self.key = None
+
+    def encode(self, msg_type, fields):
+        msg = bytes(self.encoder.encode(msg_type, fields, self.seq_num))
+        self.seq_num += 1
+        return msg
+
+class FixAcceptor:
+    # Local FIX 4.4 counterparty for both LiveTrader sessions (one port, either can connect).
+    # Answers Logon, TestRequest and Logout, sends heartbeats, streams 35=W snapshots for each
+    # MarketDataRequest at `rate` messages/second (a random walk; with sim_step_ns SendingTime
+    # advances that much per message so bars close quickly) and answers NewOrderSingle with a
+    # New and one or two Fill ExecutionReports, or a reject. Fault injection: drop each
+    # connection after disconnect_every seconds, dribble writes out in random small pieces, and
+    # put garbage bytes in front of a message with probability garbage_ratio, and skip a
+    # MsgSeqNum with probability gap_ratio. Outbound sequence numbers survive reconnects per
+    # SenderCompID/TargetCompID, and ResendRequests are answered with a gap fill.
+    def __init__(self, host="127.0.0.1", port=0, rate=1000, start_price=190.0, spread=0.02, sim_step_ns=None,
+                 reject_ratio=0.0, partial_fills=False, disconnect_every=None, partial_writes=False,
+                 garbage_ratio=0.0, gap_ratio=0.0, ssl_context=None, seed=1):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.price = start_price
+        self.spread = spread
+        self.sim_step_ns = sim_step_ns
+        self.clock = ReplayClock(time.time_ns()) if sim_step_ns else SystemClock()
+        self.reject_ratio = reject_ratio
+        self.partial_fills = partial_fills
+        self.disconnect_every = disconnect_every
+        self.partial_writes = partial_writes
+        self.garbage_ratio = garbage_ratio
+        self.gap_ratio = gap_ratio
+        self.ssl_context = ssl_context
+        self.rng = np.random.default_rng(seed)
+        self.steps = self.rng.normal(0, 0.005, 1 << 16).tolist()
+        self.step_index = 0
+        self.server = None
+        self.connections = set()
+        self.order_ids = itertools.count(1)
+        self.filled = set()
+        self.sequences = {}
+        self.dropped_at = {}
+        self.recoveries = []  # Seconds from an injected disconnect to that session's next Logon
+        self.snapshots_sent = 0
+        self.resend_requests = 0
+        self.order_times = {}  # ClOrdID -> perf_counter_ns when the NewOrderSingle arrived
+        self.disconnects = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port, ssl=self.ssl_context)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self):
+        for connection in list(self.connections):
+            for task in connection.tasks:
+                task.cancel()
+            connection.writer.transport.abort()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def _garbage(self):
+        return self.rng.integers(65, 91, int(self.rng.integers(1, 40)), dtype=np.uint8).tobytes()
+
+    async def _write(self, connection, data):
+        writer = connection.writer
+        if not self.partial_writes:
+            writer.write(data)
+            await writer.drain()
+            return
+        pos = 0
+        while pos < len(data):
+            end = pos + int(self.rng.integers(1, 64))
+            writer.write(data[pos:end])
+            pos = end
+            await writer.drain()
+            await asyncio.sleep(0)
+
+    async def _send(self, connection, msg_type, fields=b""):
+        async with connection.lock:
+            msg = connection.encode(msg_type, fields)
+            if self.garbage_ratio and self.rng.random() < self.garbage_ratio:
+                msg = self._garbage() + msg
+            await self._write(connection, msg)
+
+    async def _handle(self, reader, writer):
+        connection = _AcceptorConnection(writer)
+        self.connections.add(connection)
+        framer = FixFramer()
+        if self.disconnect_every:
+            connection.tasks.append(asyncio.create_task(self._disconnect_later(connection)))
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    return
+                framer.feed(data)
+                for raw in framer.messages():
+                    if not await self._on_message(connection, FixMessage(raw)):
+                        return
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            for task in connection.tasks:
+                task.cancel()
+            if connection.key is not None:
+                self.sequences[connection.key] = connection.seq_num
+            self.connections.discard(connection)
+            writer.transport.abort()
+
+    async def _on_message(self, connection, msg):
+        msg_type = msg.msg_type
+        if msg_type == b"A":
+            connection.encoder = FixEncoder(msg.get(56).decode(), msg.get(49).decode(),
+                                            (msg.get(50) or b"").decode(), self.clock)
+            connection.key = (msg.get(49), msg.get(56))
+            connection.seq_num = self.sequences.get(connection.key, 1)
+            if connection.key in self.dropped_at:
+                self.recoveries.append(time.perf_counter() - self.dropped_at.pop(connection.key))
+            heartbeat_interval = int(msg.get(108, b"%d" % HEARTBEAT_INTERVAL))
+            await self._send(connection, b"A", b"98=0\x01108=%d\x01" % heartbeat_interval)
+            connection.tasks.append(asyncio.create_task(self._heartbeats(connection, heartbeat_interval)))
+        elif connection.encoder is None:
+            return False
+        elif msg_type == b"V":
+            if msg.get(263) != b"2":
+                connection.tasks.append(asyncio.create_task(self._stream(connection, msg.get(55))))
+        elif msg_type == b"D":
+            self.order_times[msg.get(11)] = time.perf_counter_ns()
+            await self._execute(connection, msg)
+        elif msg_type == b"F":
+            await self._cancel(connection, msg)
+        elif msg_type == b"1":
+            await self._send(connection, b"0", b"112=%s\x01" % msg.get(112, b""))
+        elif msg_type == b"2":
+            self.resend_requests += 1
+            async with connection.lock:
+                msg = connection.encoder.encode(b"4", b"43=Y\x01123=Y\x0136=%d\x01" % connection.seq_num, int(msg.get(7)))
+                await self._write(connection, bytes(msg))
+        elif msg_type == b"5":
+            await self._send(connection, b"5")
+            return False
+        return True
+
+    async def _execute(self, connection, msg):
+        cl_ord_id, side, quantity = msg.get(11), msg.get(54), float(msg.get(38, b"0"))
+        order_id = next(self.order_ids)
+        common = b"37=%d\x0111=%s\x0155=%s\x0154=%s\x0138=%g\x01" % (order_id, cl_ord_id, msg.get(55), side, quantity)
+        if self.reject_ratio and self.rng.random() < self.reject_ratio:
+            await self._send(connection, b"8", common + b"17=%d-R\x01150=8\x0139=8\x0114=0\x01151=0\x0158=Simulated reject\x01"
+                             % order_id)
+            return
+        await self._send(connection, b"8", common + b"17=%d-N\x01150=0\x0139=0\x0114=0\x01151=%g\x01" % (order_id, quantity))
+        price = self.price + self.spread if side == b"1" else self.price
+        fills = [quantity / 2, quantity / 2] if self.partial_fills else [quantity]
+        cum_qty, notional = 0.0, 0.0
+        for i, last_qty in enumerate(fills):
+            last_px = round(price + 0.001 * i, 3)
+            cum_qty += last_qty
+            notional += last_qty * last_px
+            status = b"2" if cum_qty >= quantity else b"1"
+            await self._send(connection, b"8", common + b"17=%d-F%d\x01150=F\x0139=%s\x0132=%g\x0131=%.3f\x0114=%g\x01"
+                             b"151=%g\x016=%.5f\x01" % (order_id, i, status, last_qty, last_px, cum_qty,
+                                                       quantity - cum_qty, notional / cum_qty))
+        self.filled.add(cl_ord_id)
+
+    async def _cancel(self, connection, msg):
+        cancel_id, orig_id = msg.get(11), msg.get(41)
+        if orig_id in self.filled:
+            await self._send(connection, b"9", b"11=%s\x0141=%s\x0139=2\x01434=1\x01102=0\x0158=Too late to cancel\x01"
+                             % (cancel_id, orig_id))
+        else:
+            await self._send(connection, b"8", b"11=%s\x0141=%s\x0117=%s-C\x01150=4\x0139=4\x0114=0\x01151=0\x01"
+                             % (cancel_id, orig_id, cancel_id))
+
+    async def _heartbeats(self, connection, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await self._send(connection, b"0")
+
+    async def _disconnect_later(self, connection):
+        await asyncio.sleep(self.disconnect_every)
+        self.disconnects += 1
+        if connection.key is not None:
+            self.dropped_at[connection.key] = time.perf_counter()
+        connection.writer.transport.abort()
+
+    async def _stream(self, connection, symbol_id):
+        # Writes whatever is due every millisecond; a consumer more than a second behind loses the backlog
+        start, sent = time.perf_counter(), 0
+        steps, step_count = self.steps, len(self.steps)
+        while True:
+            due = int((time.perf_counter() - start) * self.rate) - sent
+            if due > self.rate:
+                start, due = time.perf_counter() - sent / self.rate, 0
+            if due > 0:
+                async with connection.lock:
+                    parts = []
+                    for _ in range(due):
+                        self.price += steps[self.step_index]
+                        self.step_index = (self.step_index + 1) % step_count
+                        if self.sim_step_ns:
+                            self.clock.set(self.clock.time_ns + self.sim_step_ns)
+                        parts.append(connection.encode(b"W", b"55=%s\x01268=2\x01269=0\x01270=%.3f\x01269=1\x01270=%.3f\x01"
+                                                       % (symbol_id, self.price, self.price + self.spread)))
+                        if self.garbage_ratio and self.rng.random() < self.garbage_ratio:
+                            parts.append(self._garbage())
+                        if self.gap_ratio and self.rng.random() < self.gap_ratio:
+                            connection.seq_num += 1
+                    sent += due
+                    self.snapshots_sent += due  # Counted once encoded: a disconnect can cut the write short
+                    await self._write(connection, b"".join(parts))
+            await asyncio.sleep(0.001)
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10  # Peak, where /proc is missing
+
+# Benchmarks
+def synthetic_md_stream(n_messages=100000, symbol_id=2, start_price=190.0, seed=42):
+    # Builds a byte stream of MarketDataSnapshot (35=W) messages as the quote server sends them
+    rng = np.random.default_rng(seed)
+    price = start_price
+    parts = []
+    for seq in range(1, n_messages + 1):
+        price = round(price + rng.normal(0, 0.005), 3)
+        fields = f"55={symbol_id}|268=2|269=0|270={price:.3f}|269=1|270={price + 0.02:.3f}|"
+        msg = create_fix_message("W", fields, QUOTE_TARGET_COMP_ID, QUOTE_SENDER_COMP_ID,
+                                 QUOTE_SENDER_SUB_ID, seq)
+        parts.append(msg.replace("|", "\x01").encode())
+    return b"".join(parts)
+
+def split_stream(stream, max_chunk=4096, seed=7):
+    # Splits a byte stream at random boundaries, like successive recv() calls
+    rng = np.random.default_rng(seed)
+    cuts = np.cumsum(rng.integers(1, max_chunk + 1, size=len(stream) // 2 + 1))
+    cuts = cuts[cuts < len(stream)]
+    bounds = [0, *cuts.tolist(), len(stream)]
+    return [stream[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+def benchmark_framer(path=None, n_messages=100000, max_chunk=4096, seed=7):
+    # Replays a captured raw FIX byte stream (or a synthetic one) split at random chunk boundaries
+    if path:
+        with open(path, 'rb') as f:
+            stream = f.read()
+    else:
+        stream = synthetic_md_stream(n_messages)
+    expected = stream.count(b"\x0110=")
+    chunks = split_stream(stream, max_chunk, seed)
+
+    framer = FixFramer()
+    framed = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        framer.feed(chunk)
+        for _ in framer.messages():
+            framed += 1
+    framer_elapsed = time.perf_counter() - start
+
+    legacy_found = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        decoded = chunk.decode('utf-8', errors='ignore').replace("\x01", "|")
+        if "35=W" in decoded:
+            legacy_found += 1
+    legacy_elapsed = time.perf_counter() - start
+
+    print(f"[BENCH] Framer: {framed}/{expected} messages from {len(chunks)} chunks in {framer_elapsed:.3f}s "
+          f"({framed / framer_elapsed:,.0f} msgs/s, {len(stream) / framer_elapsed / 1e6:.1f} MB/s)")
+    print(f"[BENCH] Per-recv decode: {legacy_found}/{expected} messages seen in {legacy_elapsed:.3f}s")
+    return {'messages': framed, 'expected': expected, 'framer_seconds': framer_elapsed,
+            'legacy_messages': legacy_found, 'legacy_seconds': legacy_elapsed}
+
+def legacy_parse_market_data(msg):
+    # The original string-based 35=W handling, kept as the parser benchmark baseline
+    fields = dict(f.split("=") for f in msg.split("|") if "=" in f)
+    symbol_id = int(fields.get('55', fields.get('146', 0)))
+    instrument = next((k for k, v in symbol_id_map.items() if v == symbol_id), None)
+    bid = ask = None
+    for i, field in enumerate(msg.split("|")):
+        if field == "269=0":
+            bid = float(msg.split("|")[i + 1].split("=")[1])
+        elif field == "269=1":
+            ask = float(msg.split("|")[i + 1].split("=")[1])
+    tick_time = pd.to_datetime(fields.get('52'), utc=True)
+    return instrument, {'time': tick_time, 'bid': bid or 0, 'ask': ask or bid or 0}
+
+def benchmark_md_parser(n_messages=20000):
+    framer = FixFramer()
+    framer.feed(synthetic_md_stream(n_messages))
+    raws = [bytes(raw) for raw in framer.messages()]
+    index = build_symbol_index(symbol_id_map)
+
+    start = time.perf_counter()
+    for raw in raws:
+        legacy_parse_market_data(fix_to_text(raw))
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for raw in raws:
+        if fix_msg_type(raw) == b"W":
+            snapshot = parse_market_data(raw)
+            index.get(snapshot.symbol_id)
+            parse_fix_timestamp_ns(snapshot.sending_time)
+    parser_elapsed = time.perf_counter() - start
+
+    legacy_rate = len(raws) / legacy_elapsed
+    parser_rate = len(raws) / parser_elapsed
+    print(f"[BENCH] Legacy 35=W parse: {legacy_rate:,.0f} msgs/s")
+    print(f"[BENCH] Tag-offset 35=W parse: {parser_rate:,.0f} msgs/s ({parser_rate / legacy_rate:.1f}x)")
+    return {'legacy_msgs_per_sec': legacy_rate, 'parser_msgs_per_sec': parser_rate}
+
+def benchmark_tick_store(ticks_per_second=50, hours=4, buckets=8, concat_sample=5000):
+    # Per-tick append latency over a full H4 session, reported per time bucket to show it stays flat
+    n_ticks = ticks_per_second * hours * 3600
+    rng = np.random.default_rng(1)
+    times = (1_700_000_000 * 1_000_000_000 + np.arange(n_ticks) * (1_000_000_000 // ticks_per_second)).tolist()
+    bids = (190.0 + np.cumsum(rng.normal(0, 0.002, n_ticks))).tolist()
+    lock = Lock()
+    store = TickStore()
+    bucket_size = n_ticks // buckets
+    latencies = []
+    for b in range(buckets):
+        start = time.perf_counter()
+        for i in range(b * bucket_size, (b + 1) * bucket_size):
+            with lock:
+                store.append(times[i], bids[i], bids[i] + 0.02)
+        latencies.append((time.perf_counter() - start) / bucket_size * 1e6)
+    print(f"[BENCH] TickStore: {n_ticks:,} ticks, per-tick append (us) by session bucket: "
+          + ", ".join(f"{us:.2f}" for us in latencies))
+
+    frame = pd.DataFrame(columns=['time', 'bid', 'ask'])
+    concat_latencies = []
+    step = concat_sample // 5
+    start = time.perf_counter()
+    for i in range(concat_sample):
+        tick = {'time': pd.Timestamp(times[i], tz='UTC'), 'bid': bids[i], 'ask': bids[i] + 0.02}
+        frame = pd.concat([frame, pd.DataFrame([tick])], ignore_index=True)
+        if (i + 1) % step == 0:
+            now = time.perf_counter()
+            concat_latencies.append((now - start) / step * 1e6)
+            start = now
+    print(f"[BENCH] pd.concat: first {concat_sample:,} ticks, per-tick append (us) by bucket: "
+          + ", ".join(f"{us:.0f}" for us in concat_latencies))
+    return {'tick_store_us': latencies, 'concat_us': concat_latencies}
+
+def benchmark_bar_builder(n_ticks=1_000_000, ticks_per_second=50):
+    rng = np.random.default_rng(3)
+    times = (1_700_000_000 * 1_000_000_000 + np.arange(n_ticks) * (1_000_000_000 // ticks_per_second)).tolist()
+    bids = (190.0 + np.cumsum(rng.normal(0, 0.002, n_ticks))).tolist()
+    builder = BarBuilder()
+    closed = 0
+    start = time.perf_counter()
+    for t, bid in zip(times, bids):
+        closed += len(builder.update(t, bid, bid + 0.02))
+    elapsed = time.perf_counter() - start
+    print(f"[BENCH] BarBuilder: {n_ticks:,} ticks on {len(builder.timeframes)} timeframes in {elapsed:.2f}s "
+          f"({elapsed / n_ticks * 1e6:.2f} us/tick), {closed:,} bars closed")
+    return {'us_per_tick': elapsed / n_ticks * 1e6, 'bars_closed': closed}
+
+def benchmark_dispatch(n_ticks=200000, ticks_per_second=50):
+    # Drives LiveTrader's subscribers with synthetic ticks and reports tick-to-decision percentiles
+    rng = np.random.default_rng(5)
+    times = (1_700_000_000 * 1_000_000_000 + np.arange(n_ticks) * (1_000_000_000 // ticks_per_second)).tolist()
+    bids = (190.0 + np.cumsum(rng.normal(0, 0.002, n_ticks))).tolist()
     trader = LiveTrader()
+    instrument = next(iter(symbol_id_map))
+    trader.active_positions[instrument] = {'signal': 'BUY', 'entry_price': bids[0], 'sl': 0.0,
+                                           'tp': float('inf'), 'time': None, 'opened_ns': times[0],
+                                           'checked_index': 0}
+    trader.book.open_position(trader.book.slot[instrument], 'BUY', 0.0, float('inf'))
+    strategy = Thread(target=trader.run_signals, daemon=True)
+    strategy.start()
+    start = time.perf_counter()
+    for t, bid in zip(times, bids):
+        trader.dispatcher.publish(instrument, t, bid, bid + 0.02)
+    elapsed = time.perf_counter() - start
+    time.sleep(0.1)
+    print(f"[BENCH] Dispatch: {n_ticks:,} ticks in {elapsed:.2f}s ({elapsed / n_ticks * 1e6:.2f} us/tick)")
+    trader.dispatcher.report()
+    return {'us_per_tick': elapsed / n_ticks * 1e6,
+            'percentiles': {name: trader.dispatcher.latency[name].percentiles() for name in trader.dispatcher.names}}
+
+def benchmark_metrics(n_events=1_000_000):
+    # Hot-path cost of the instrumentation primitives, per event
+    metrics = Metrics()
+    recorder = metrics.stage("bench")
+    timed, plain = metrics.lock("bench"), Lock()
+    values = np.random.default_rng(3).lognormal(9, 1, n_events).astype(np.int64).tolist()
+    counter = metrics.counter("messages", (("session", "Quotes"), ("type", b"W")))
+    costs = {}
+    start = time.perf_counter_ns()
+    for value in values:
+        pass
+    baseline = time.perf_counter_ns() - start
+    start = time.perf_counter_ns()
+    for value in values:
+        recorder.record(time.perf_counter_ns() - value)
+    costs['timestamp + record'] = time.perf_counter_ns() - start - baseline
+    start = time.perf_counter_ns()
+    for value in values:
+        counter.value += 1
+    costs['counter inc'] = time.perf_counter_ns() - start - baseline
+    start = time.perf_counter_ns()
+    for value in values:
+        with plain:
+            pass
+    lock_cost = time.perf_counter_ns() - start
+    start = time.perf_counter_ns()
+    for value in values:
+        with timed:
+            pass
+    costs['lock wait timing'] = time.perf_counter_ns() - start - lock_cost
+    for name, total in costs.items():
+        print(f"[BENCH] Metrics {name}: {total / n_events:.0f} ns/event")
+    accuracy = LatencyRecorder()
+    for value in values:
+        accuracy.record(value)
+    exact = np.percentile(values, (50, 99, 99.9)) / 1000
+    approx = accuracy.percentiles((50, 99, 99.9))
+    print(f"[BENCH] Histogram p50/p99/p99.9 {approx[50]:.2f}/{approx[99]:.2f}/{approx[99.9]:.2f}us, "
+          f"exact {exact[0]:.2f}/{exact[1]:.2f}/{exact[2]:.2f}us")
+    return {name: total / n_events for name, total in costs.items()}
+
+def benchmark_logging(n_messages=100000, journal_path=None):
+    # Quote-loop tick throughput (framing, parse, dispatch) with logging off, sampled, full and journal-only
+    stream = synthetic_md_stream(n_messages)
+    chunks = split_stream(stream)
+    journal_path = journal_path or os.path.join(tempfile.mkdtemp(), "fix_journal.bin")
+    modes = {
+        'off': dict(levels={"session": "OFF", "market_data": "OFF", "orders": "OFF"}, journal_path=None),
+        'sampled': dict(levels=None, journal_path=None),
+        'full': dict(levels=None, journal_path=None, md_rate=n_messages),
+        'journal': dict(levels={"session": "OFF", "market_data": "OFF", "orders": "OFF"}, journal_path=journal_path),
+    }
+
+    async def drive(session):
+        protocol = session.protocol = FramerProtocol(session.framer)
+
+        async def feed():
+            # One chunk per loop iteration, as the transport would hand them over
+            for chunk in chunks:
+                protocol.get_buffer(len(chunk))[:len(chunk)] = chunk
+                protocol.buffer_updated(len(chunk))
+                await asyncio.sleep(0)
+            protocol.eof_received()
+
+        feeder = asyncio.ensure_future(feed())
+        await session._read_loop()
+        await feeder
+
+    results = {}
+    with open(os.devnull, 'w') as devnull:
+        for mode, options in modes.items():
+            logger = AsyncLogger(stream=devnull, **options)
+            trader = LiveTrader(notifier=TelegramNotifier(), logger=logger)
+            start = time.perf_counter()
+            asyncio.run(drive(trader.quote_session))
+            elapsed = time.perf_counter() - start
+            logger.close()
+            results[mode] = n_messages / elapsed
+            print(f"[BENCH] Logging {mode}: {results[mode]:,.0f} ticks/s")
+    journaled = sum(1 for _ in AsyncLogger.read_journal(journal_path))
+    print(f"[BENCH] Journal: {journaled:,} messages, {os.path.getsize(journal_path) / journaled:.0f} bytes/message")
+    return results
+
+def benchmark_backtest(n_ticks=20_000_000, chunk_size=5_000_000):
+    times, bids, asks = synthetic_ticks(n_ticks)
+    chunks = [(times[i:i + chunk_size], bids[i:i + chunk_size], asks[i:i + chunk_size])
+              for i in range(0, n_ticks, chunk_size)]
+    backtester = Backtester(seed=1)
+    start = time.perf_counter()
+    ledger, stats = backtester.run(chunks)
+    elapsed = time.perf_counter() - start
+    print(f"[BENCH] Backtest: {n_ticks:,} ticks, {backtester.bars_closed:,} H4 bars, {stats['trades']} trades "
+          f"in {elapsed:.2f}s ({n_ticks / elapsed * 60 / 1e6:,.0f}M ticks/min)")
+    print(f"[BENCH] Total pips: {stats['total_pips']:.1f}, win rate: {stats['win_rate']:.1%}, "
+          f"max drawdown: {stats['max_drawdown_pips']:.1f} pips")
+    return ledger, stats
+
+def benchmark_signals(years=10, n_tolerances=1000, lookbacks=(1, 6), seed=12):
+    # Whole-history signal scans over a tolerance grid, checked against the incremental live form
+    rng = np.random.default_rng(seed)
+    n_bars = years * 260 * 6
+    close = 190.0 + np.cumsum(rng.normal(0, 0.25, n_bars))
+    open_ = np.concatenate(([190.0], close[:-1]))
+    bars = {'open': open_, 'close': close,
+            'high': np.maximum(open_, close) + rng.exponential(0.1, n_bars),
+            'low': np.minimum(open_, close) - rng.exponential(0.1, n_bars)}
+    pip_value = pairs_params["GBP_JPY"]['pip_value']
+    tolerances = np.linspace(1.0, 60.0, n_tolerances) * pip_value
+    for lookback in lookbacks:
+        start = time.perf_counter()
+        buy, sell = equal_levels_rule(bars, tolerances, lookback)
+        elapsed = time.perf_counter() - start
+        state = EqualLevelsState(tolerances[n_tolerances // 2], lookback)
+        rows = [bars[name].tolist() for name in ('open', 'high', 'low', 'close')]
+        start = time.perf_counter()
+        live = [state.update(*bar) for bar in zip(*rows)]
+        live_ns = (time.perf_counter() - start) / n_bars * 1e9
+        assert [b for b, _ in live] == buy[n_tolerances // 2].tolist()
+        assert [s for _, s in live] == sell[n_tolerances // 2].tolist()
+        print(f"[BENCH] Signals: {n_bars:,} H4 bars ({years} years) x {n_tolerances:,} tolerances, lookback {lookback}, "
+              f"in {elapsed * 1e3:.1f}ms ({(buy | sell).sum():,} signals); incremental {live_ns:.0f} ns/bar")
+    return buy, sell
+
+def benchmark_exits(n_ticks=5_000_000, n_positions=10000, sl_pips=40.0, tp_pips=80.0, loop_sample=500):
+    # Batched exit resolution for random historical positions, checked against the per-position scan
+    times, bids, asks = synthetic_ticks(n_ticks)
+    params = pairs_params["GBP_JPY"]
+    rng = np.random.default_rng(4)
+    entry_index = np.sort(rng.integers(0, n_ticks - 1, n_positions))
+    side = np.where(rng.random(n_positions) < 0.5, 'BUY', 'SELL')
+    entry_price = np.where(side == 'BUY', asks[entry_index], bids[entry_index])
+    sl, tp = bracket_prices(entry_price, 'BUY', dict(params, sl_pips=sl_pips, tp_pips=tp_pips))
+    sell_sl, sell_tp = bracket_prices(entry_price, 'SELL', dict(params, sl_pips=sl_pips, tp_pips=tp_pips))
+    sl, tp = np.where(side == 'BUY', sl, sell_sl), np.where(side == 'BUY', tp, sell_tp)
+    start = time.perf_counter()
+    exits = resolve_exits(times, bids, asks, side, times[entry_index], entry_price, sl, tp, params['pip_value'])
+    batched = time.perf_counter() - start
+
+    sample = rng.choice(n_positions, min(loop_sample, n_positions), replace=False)
+    start = time.perf_counter()
+    looped = [first_exit(side[k], bids, asks, sl[k], tp[k], int(entry_index[k]), n_ticks)[0] for k in sample]
+    loop_per_position = (time.perf_counter() - start) / len(sample)
+    assert [-1 if index is None else index for index in looped] == exits['exit_index'][sample].tolist()
+
+    done = exits['exit_index'] >= 0
+    stops = done & (exits['exit_reason'] == 'SL')
+    print(f"[BENCH] Exits: {n_positions:,} positions over {n_ticks:,} ticks in {batched * 1e3:.0f}ms "
+          f"({batched / n_positions * 1e6:.1f} us/position, per-position scan {loop_per_position * 1e6:.0f} us)")
+    print(f"[BENCH] Resolved {done.sum():,}, median time in trade "
+          f"{np.median(exits['time_in_trade_ns'][done]) / 3.6e12:.1f}h, stop fills past the level "
+          f"{(exits['gap_pips'][stops] < 0).mean():.1%} (mean {exits['gap_pips'][stops].mean():.2f} pips)")
+    return exits
+
+def benchmark_execution(n_fills=5_000_000, n_orders=100_000, n_ticks=20_000_000, paths=10000):
+    # Bulk fill sampling, the live single-fill path, and a Monte Carlo stress test of a backtest ledger
+    params = pairs_params["GBP_JPY"]
+    execution = RealisticExecution(params, rng=np.random.default_rng(3))
+    hours = np.arange(n_fills) % 24
+    start = time.perf_counter()
+    fills = execution.sample(n_fills, hours)
+    elapsed = time.perf_counter() - start
+    cost_pips = fills['cost'] / params['pip_value']
+    print(f"[BENCH] Execution: {n_fills:,} fills in {elapsed:.2f}s ({n_fills / elapsed / 1e6:.1f}M fills/s), "
+          f"cost p50={np.percentile(cost_pips, 50):.2f} p99={np.percentile(cost_pips, 99):.2f} "
+          f"p99.99={np.percentile(cost_pips, 99.99):.2f} pips")
+
+    start = time.perf_counter()
+    for i in range(n_orders):
+        execution.adjust_price(190.0, 'BUY', i % 24)
+    single_ns = (time.perf_counter() - start) / n_orders * 1e9
+    start = time.perf_counter()
+    for _ in range(n_orders):
+        RealisticExecution(params).adjust_price(190.0, 'BUY')  # An instance per order, as send_order used to
+    per_order_ns = (time.perf_counter() - start) / n_orders * 1e9
+    print(f"[BENCH] Live fill: {single_ns:.0f} ns from the shared buffer, {per_order_ns:,.0f} ns with an instance per order")
+
+    ledger, stats = Backtester(seed=1).run([synthetic_ticks(n_ticks)])
+    start = time.perf_counter()
+    table = monte_carlo_ledger(ledger, params, paths=paths, seed=7)
+    elapsed = time.perf_counter() - start
+    quantiles = table['total_pips'].quantile([0.05, 0.5, 0.95])
+    print(f"[BENCH] Stress test: {paths:,} paths x {len(ledger)} trades in {elapsed:.2f}s; total pips "
+          f"backtest {stats['total_pips']:.1f}, p5 {quantiles[0.05]:.1f}, p50 {quantiles[0.5]:.1f}, "
+          f"p95 {quantiles[0.95]:.1f}; worst drawdown {table['max_drawdown_pips'].max():.1f} pips")
+    return table
+
+def benchmark_sweep(n_ticks=5_000_000, n_combos=256, process_counts=None):
+    times, bids, asks = synthetic_ticks(n_ticks, mean_gap_ms=2000)
+    sweep = ParameterSweep(times, bids, asks)
+    combos = ParameterSweep.random(n_combos)
+    process_counts = process_counts or sorted({1, 2, os.cpu_count() or 1})
+    timings = {}
+    try:
+        for processes in process_counts:
+            start = time.perf_counter()
+            table = sweep.run(combos, processes=processes)
+            timings[processes] = time.perf_counter() - start
+            print(f"[BENCH] Sweep: {len(table):,} evaluations on {processes} process(es) in {timings[processes]:.2f}s "
+                  f"(speedup {timings[process_counts[0]] / timings[processes]:.2f}x)")
+    finally:
+        sweep.close()
+    print(ParameterSweep.rank(table).head(5).to_string(index=False))
+    print(ParameterSweep.walk_forward(table).to_string(index=False))
+    return timings
+
+def benchmark_instruments(symbol_counts=(1, 10, 25, 50, 100), n_ticks=100_000):
+    # Tick throughput through parse + dispatch, and the all-instrument signal/exit passes, as symbols scale
+    base_params = pairs_params[next(iter(pairs_params))]
+    rng = np.random.default_rng(9)
+    results = []
+    for count in symbol_counts:
+        symbols = {f"SYM{i:03d}": 1000 + i for i in range(count)}
+        params = {instrument: dict(base_params) for instrument in symbols}
+        trader = LiveTrader(clock=ReplayClock(1_700_000_000 * 1_000_000_000), symbols=symbols, params=params)
+        ids = rng.integers(1000, 1000 + count, n_ticks)
+        prices = 190.0 + np.cumsum(rng.normal(0, 0.002, n_ticks))
+        raws = [create_fix_message("W", f"55={symbol_id}|268=2|269=0|270={price:.3f}|269=1|270={price + 0.02:.3f}|",
+                                   QUOTE_TARGET_COMP_ID, QUOTE_SENDER_COMP_ID, QUOTE_SENDER_SUB_ID, seq)
+                .replace("|", "\x01").encode() for seq, (symbol_id, price) in enumerate(zip(ids.tolist(), prices.tolist()), 1)]
+        start = time.perf_counter()
+        for raw in raws:
+            trader.on_quote_message(raw, b"W", time.perf_counter_ns())
+        tick_rate = n_ticks / (time.perf_counter() - start)
+
+        book = trader.book
+        for slot in range(count):
+            for _ in range(2):
+                high = 190.0 + rng.random()
+                book.push_bar(slot, {'time': 0, 'open': high - 0.5, 'high': high, 'low': high - 1.0,
+                                     'close': high - 0.4, 'bid': high - 0.4, 'ask': high - 0.38})
+            book.open_position(slot, 'BUY', 180.0, 200.0)
+        repeats = 1000
+        start = time.perf_counter()
+        for _ in range(repeats):
+            book.signal_scan()
+        signal_us = (time.perf_counter() - start) / repeats * 1e6
+        start = time.perf_counter()
+        for _ in range(repeats):
+            book.exit_scan()
+        exit_us = (time.perf_counter() - start) / repeats * 1e6
+        print(f"[BENCH] {count:3d} symbols: {tick_rate:,.0f} ticks/s, signal pass {signal_us:.1f}us, "
+              f"exit pass {exit_us:.1f}us")
+        results.append({'symbols': count, 'ticks_per_sec': tick_rate, 'signal_pass_us': signal_us, 'exit_pass_us': exit_us})
+    return pd.DataFrame(results)
+
+def benchmark_orders(n_orders=10000):
+    # Thousands of in-flight orders: ack then fill each one, timing ExecutionReport handling
+    manager = OrderManager()
+    encoder = FixEncoder(TRADE_TARGET_COMP_ID, TRADE_SENDER_COMP_ID, TRADE_SENDER_SUB_ID)
+    orders = [manager.new_order("GBP_JPY", "BUY", ORDER_QUANTITY, 189.5, 191.5) for _ in range(n_orders)]
+    reports = []
+    for status, exec_type in ((b"0", b"0"), (b"2", b"F")):
+        for i, order in enumerate(orders):
+            fields = (b"37=%d\x0111=%s\x0117=%s-%s\x01150=%s\x0139=%s\x0155=2\x0154=1\x0138=0.01\x01"
+                      % (i, order.cl_ord_id, order.cl_ord_id, exec_type, exec_type, status))
+            if exec_type == b"F":
+                fields += b"32=0.01\x0131=190.012\x0114=0.01\x01151=0\x016=190.012\x01"
+            reports.append(bytes(encoder.encode(b"8", fields, len(reports) + 1)))
+    start = time.perf_counter()
+    for raw in reports:
+        manager.on_execution_report(raw)
+    elapsed = time.perf_counter() - start
+    filled = sum(order.status == "FILLED" for order in orders)
+    print(f"[BENCH] Orders: {len(reports):,} ExecutionReports for {n_orders:,} orders in {elapsed * 1000:.1f} ms "
+          f"({elapsed / len(reports) * 1e6:.2f} us/report), {filled:,} filled")
+    return {'us_per_report': elapsed / len(reports) * 1e6, 'filled': filled}
+
+def benchmark_end_to_end(rate=20000, duration=30.0, order_every=5000, sim_step_ns=1_000_000_000, **faults):
+    # LiveTrader against a local FixAcceptor over TCP: achieved tick throughput, tick-to-order
+    # latency (probe signal on every order_every-th tick until the NewOrderSingle reaches the
+    # acceptor; probes are the orders without a candle time) and RSS growth. Faults are passed
+    # through to FixAcceptor.
+    async def main():
+        acceptor = FixAcceptor(rate=rate, sim_step_ns=sim_step_ns, **faults)
+        port = await acceptor.start()
+        logger = AsyncLogger(levels={"session": "OFF", "market_data": "OFF", "orders": "OFF"}, journal_path=None)
+        notifier = TelegramNotifier(max_pending=0)  # Alerts are dropped, not posted
+        trader = LiveTrader(notifier=notifier, logger=logger, state_dir=tempfile.mkdtemp())
+        for session in (trader.quote_session, trader.trade_session):
+            session.host, session.port, session.ssl_context = acceptor.host, port, None
+        probes = []
+        ticks_seen = itertools.count(1)
+
+        def probe(instrument, time_ns, bid, ask):
+            if next(ticks_seen) % order_every == 0:
+                probes.append(time.perf_counter_ns())
+                trader.signal_queue.put({'instrument': instrument, 'signal': 'BUY', 'entry_price': ask, 'time': None})
+
+        trader.dispatcher.subscribe("probe", probe)
+        Thread(target=trader.run_signals, daemon=True).start()
+        task = asyncio.create_task(trader.run_async())
+        rss = [rss_mb()]
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            await asyncio.sleep(1)
+            rss.append(rss_mb())
+        elapsed = time.perf_counter() - start
+        task.cancel()
+        await acceptor.close()
+        logger.close()
+        return acceptor, trader, probes, rss, elapsed
+
+    acceptor, trader, probes, rss, elapsed = asyncio.run(main())
+    ticks = sum(counter.value for counter in trader.tick_counts.values())
+    probe_orders = [order.cl_ord_id for order in trader.orders.orders.values() if order.signal_time is None]
+    pairs = [(acceptor.order_times[cl_ord_id], probe_ns) for cl_ord_id, probe_ns in zip(probe_orders, probes)
+             if cl_ord_id in acceptor.order_times]
+    n = len(pairs)
+    latency = np.array([received - probed for received, probed in pairs]) / 1000
+    reconnects = sum(counter.value for (name, _), counter in trader.metrics.counters.items() if name == "reconnects")
+    print(f"[BENCH] End-to-end: offered {acceptor.snapshots_sent / elapsed:,.0f} msg/s, processed {ticks / elapsed:,.0f} "
+          f"ticks/s over {elapsed:.0f}s, {acceptor.disconnects} disconnects, {reconnects} reconnects, "
+          f"{acceptor.resend_requests} resend requests")
+    if acceptor.recoveries:
+        print(f"[BENCH] Reconnect to logon: p50={np.median(acceptor.recoveries) * 1000:.1f}ms "
+              f"max={max(acceptor.recoveries) * 1000:.1f}ms")
+    if n:
+        p50, p99 = np.percentile(latency, (50, 99))
+        print(f"[BENCH] Tick-to-order: p50={p50:.0f}us p99={p99:.0f}us max={latency.max():.0f}us ({n} orders)")
+    half = rss[len(rss) // 2:]
+    growth = np.polyfit(np.arange(len(half)) / 60, half, 1)[0] if len(half) > 1 else 0.0  # Seconds -> MB/min
+    print(f"[BENCH] RSS: {rss[0]:.0f} MB -> {rss[-1]:.0f} MB, second-half growth {growth:.1f} MB/min")
+    return {'offered_per_s': acceptor.snapshots_sent / elapsed, 'ticks_per_s': ticks / elapsed,
+            'tick_to_order_us': latency.tolist(), 'rss_mb': rss, 'reconnects': reconnects}
+
+COLD_START_CHILD = """
+import sys, time, asyncio
+start = time.perf_counter()
+if {eager}:
+    import numpy, pandas, requests
+import fixapicode
+imported = time.perf_counter()
+trader = fixapicode.LiveTrader(logger=fixapicode.AsyncLogger(
+    levels={{"session": "OFF", "market_data": "OFF", "orders": "OFF"}}, journal_path=None))
+session = trader.trade_session
+session.host, session.port, session.ssl_context = "127.0.0.1", {port}, None
+asyncio.run(session.connect())
+print(imported - start, time.perf_counter() - start, fixapicode.rss_mb(),
+      "+".join(name for name in ("numpy", "pandas", "requests") if name in sys.modules) or "-")
+"""
+
+def benchmark_cold_start(runs=5):
+    # Fresh interpreters logging on to a local FixAcceptor: import time, time-to-logon (from
+    # interpreter start) and RSS at logon, lazy imports vs importing the analytics stack up front
+    import subprocess
+    here = os.path.dirname(os.path.abspath(__file__))
+    loop = asyncio.new_event_loop()
+    acceptor = FixAcceptor()
+    port = loop.run_until_complete(acceptor.start())
+    Thread(target=loop.run_forever, daemon=True).start()
+    results = {}
+    try:
+        for mode, eager in (("lazy", False), ("eager", True)):
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                out = subprocess.run([sys.executable, "-c", COLD_START_CHILD.format(eager=eager, port=port)],
+                                     cwd=here, capture_output=True, text=True, check=True).stdout.split()
+                total = time.perf_counter() - start
+                samples.append((float(out[0]), float(out[1]), total, float(out[2]), out[3]))
+            import_s, logon_s, total_s, rss, modules = (sorted(column)[len(column) // 2] for column in zip(*samples))
+            results[mode] = {'import_ms': import_s * 1000, 'logon_ms': logon_s * 1000, 'process_ms': total_s * 1000,
+                             'rss_mb': rss}
+            print(f"[BENCH] Cold start {mode}: import {import_s * 1000:.0f}ms, logon after {logon_s * 1000:.0f}ms "
+                  f"({total_s * 1000:.0f}ms incl. interpreter), RSS {rss:.0f} MB, loaded at logon: {modules}")
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+    importtime = subprocess.run([sys.executable, "-X", "importtime", "-c", "import fixapicode"], cwd=here,
+                                capture_output=True, text=True).stderr.splitlines()
+    direct = [line.split("|") for line in importtime if line.count("|") == 2]
+    slowest = sorted((int(cumulative), name.strip()) for _, cumulative, name in direct
+                     if name.startswith("   ") and not name.startswith("    "))[-5:]
+    print("[BENCH] Slowest imports under fixapicode (cumulative us): "
+          + ", ".join(f"{name} {us}" for us, name in reversed(slowest)))
+    return results
+
+def benchmark_encoder(n_orders=50000):
+    # Order-to-wire: build a NewOrderSingle and push it into a socket, old path vs FixEncoder
+    encoder = FixEncoder(TRADE_SENDER_COMP_ID, TRADE_TARGET_COMP_ID, TRADE_SENDER_SUB_ID)
+    sender, receiver = socket.socketpair()
+    drain = Thread(target=lambda: [None for _ in iter(lambda: receiver.recv(1 << 20), b"")], daemon=True)
+    drain.start()
+    legacy, fast = np.empty(n_orders), np.empty(n_orders)
+    for i in range(n_orders):
+        start = time.perf_counter_ns()
+        msg = create_fix_message(
+            "D", f"11={i}|55=2|54=1|38=0.01|40=1|99={189.5:.3f}|44={191.5:.3f}|59=1|167=FX|",
+            TRADE_SENDER_COMP_ID, TRADE_TARGET_COMP_ID, TRADE_SENDER_SUB_ID, i)
+        sender.send(msg.replace("|", "\x01").encode())
+        legacy[i] = time.perf_counter_ns() - start
+    for i in range(n_orders):
+        start = time.perf_counter_ns()
+        encoder.send(sender, b"D", b"11=%d\x0155=2\x0154=1\x0138=0.01\x0140=1\x0199=%.3f\x0144=%.3f\x0159=1\x01167=FX\x01"
+                     % (i, 189.5, 191.5), i)
+        fast[i] = time.perf_counter_ns() - start
+    sender.close()
+    drain.join(timeout=1)
+    receiver.close()
+    for name, samples in (("create_fix_message + send", legacy), ("FixEncoder + sendall", fast)):
+        p50, p99 = np.percentile(samples, (50, 99)) / 1000
+        print(f"[BENCH] {name}: order-to-wire p50={p50:.2f}us p99={p99:.2f}us")
+    return {'legacy_p50_us': float(np.median(legacy) / 1000), 'encoder_p50_us': float(np.median(fast) / 1000)}
+
+if __name__ == "__main__":
+    trader = LiveTrader(archive=TickArchive(ARCHIVE_DIR) if ARCHIVE_DIR else None, state_dir=SESSION_STATE_DIR)
     trader.run()
 
 # README
 # Overview:
-# This script implements a live forex trading system for GBP/JPY using the FIX 4.4 protocol to connect to a broker’s quote and trade servers. It aggregates H4 candlestick data, detects buy/sell signals based on equal highs and lows, executes trades with realistic slippage and commission, and sends trade notifications via Telegram. The system uses multithreading for quotes, signals, and trading, designed to run continuously in Google Colab.
+# This script implements a live forex trading system for GBP/JPY using the FIX 4.4 protocol to connect to a broker’s quote and trade servers. It aggregates H4 candlestick data, detects buy/sell signals based on equal highs and lows, executes trades with realistic slippage and commission, and sends trade notifications via Telegram. Both FIX sessions run on one asyncio event loop (with strategy evaluation on a separate thread), designed to run continuously in Google Colab.
 #
 # Usage Instructions:
 # 1. Open Google Colab (colab.research.google.com) and create a new notebook.
@@ -531,14 +3798,25 @@ if __name__ == "__main__":
 # - Update `symbol_id_map` to trade other pairs (e.g., `"EUR_USD": 1`), ensuring correct broker symbol IDs.
 # - Modify `pairs_params` to adjust strategy parameters (tolerance, stop-loss, take-profit, etc.) for each pair.
 # - Change the trading restriction in `is_trading_allowed` (e.g., remove 21:00–23:00 UTC limit).
-# - Customize `detect_signals` for alternative strategies (e.g., different candlestick patterns).
-# - Adjust `RealisticExecution` parameters (slippage, spread, commission) to match your broker’s conditions.
+# - Add alternative strategies (e.g., different candlestick patterns) to `SIGNAL_RULES` as an array rule over OHLC arrays plus an incremental state for live bars, and select one per pair with a `"rule"` entry in `pairs_params`; `lookback` sets how many earlier H4 bars an equal high/low may match, and `equal_levels_rule(bars, tolerances)` scans a whole history for a vector of tolerances at once.
+# - Adjust `RealisticExecution` parameters (slippage, spread, commission, latency_ms, volatility) and `SPREAD_HOUR_PROFILE` to match your broker’s conditions; `monte_carlo_ledger(ledger, params, paths=10000)` re-prices a backtest ledger's entries under thousands of cost scenarios.
 # - Update FIX connection details (host, port) if using a different broker or environment.
+# - Backtest the strategy offline with `Backtester(seed=1).run(iter_tick_chunks("ticks.npz"))`, which returns a trade ledger and P&L/pip statistics.
+# - Ticks and closed candles are archived under `ARCHIVE_DIR` (set it to `None` to disable) and reload on restart; `TickArchive(ARCHIVE_DIR).iter_range(instrument, start_ns, end_ns)` feeds the backtester directly.
+# - Re-optimize `pairs_params` with `ParameterSweep(times, bids, asks).run(ParameterSweep.grid(...))`; use `ParameterSweep.rank` and `ParameterSweep.walk_forward` on the result table.
 #
 # Notes:
 # - Ensure a stable internet connection, as the script relies on continuous FIX server communication.
 # - This is configured for a demo environment. For live trading, verify credentials and risk parameters carefully.
 # - Multithreading may consume significant resources; monitor Colab’s CPU/memory usage.
 # - Telegram notifications require a valid bot token and chat ID; test the bot setup beforehand.
+# - Notifications are queued and sent from a background thread; bursts within half a second arrive as one message, and if Telegram is unreachable for long the oldest backlog is kept and later ones are counted as dropped.
+# - Latency histograms per stage, per-instrument lock waits and message/tick/reject/reconnect counters are served in Prometheus text format on http://127.0.0.1:9108/metrics (METRICS_PORT) and printed every minute.
+# - FIX traffic is logged from a background thread; LOG_LEVELS sets the level per category (session, market_data, orders), market data is capped at MD_LOG_RATE lines per second, and FIX_JOURNAL records every raw message to a binary file readable with AsyncLogger.read_journal().
+# - Orders carry unique ClOrdIDs and are tracked from ExecutionReports: a position opens at the expected price, moves to the broker's average fill price on fills, and is dropped if the order is rejected or cancelled unfilled.
+# - Without broker access, `FixAcceptor` is a local FIX 4.4 counterparty (quotes, fills, injected disconnects/partial writes/garbage); `benchmark_end_to_end(rate=20000, duration=600)` runs LiveTrader against it and reports tick throughput, tick-to-order latency and memory growth.
+# - FIX sequence numbers persist under `SESSION_STATE_DIR` (delete a session's .seq file to start it from 1); inbound gaps are re-requested, and a dropped session reconnects immediately, then with jittered backoff up to 30 s.
+# - pandas and requests are imported lazily: sessions log on using only the standard library and numpy, while the rest loads on a background thread (`benchmark_cold_start()` compares lazy and eager startup).
+# - Exits are checked on every tick received since the last check and filled at that tick's closing quote (bid for BUY, ask for SELL), so gaps through SL/TP show up in the reported price, pips and time in trade; `resolve_exits(times, bids, asks, side, entry_ns, entry_price, sl, tp, pip_value)` resolves thousands of historical positions in one call.
 # - The script runs indefinitely until interrupted (Ctrl+C); ensure proper shutdown to close sockets.
 # - Contact for support or enhancements (e.g., adding new pairs, strategies, or logging).
\ No newline at end of file